@@ -0,0 +1,410 @@
+"""Compiled kernels for the sprite overlap and collision handlers.
+
+The kernels work on plain floats and small numpy arrays so they can be
+compiled with numba. numba is optional: without it the same functions run as
+regular Python.
+"""
+
+import math
+import numpy as np
+
+try:
+  from numba import njit
+except ImportError:  # numba not installed, run the kernels as plain Python
+  def njit(*args, **kwargs):
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+      return args[0]
+    return lambda fn: fn
+
+# direction codes used by the kernels
+DOWN, UP, RIGHT, LEFT = 0, 1, 2, 3
+DIR = {"down": DOWN, "up": UP, "right": RIGHT, "left": LEFT}
+
+# slack absorbing rounding differences between bounds and shape tests
+TOUCH_EPS = 1e-9
+
+# contact points at 315 and 225 degrees on a circle
+C7PI4, S7PI4 = math.cos(7 * math.pi / 4), math.sin(7 * math.pi / 4)
+C5PI4, S5PI4 = math.cos(5 * math.pi / 4), math.sin(5 * math.pi / 4)
+
+
+@njit(cache=True)
+def bboxes_touch(a, b):
+  """Whether the (xmin, ymin, xmax, ymax) boxes a and b touch or overlap."""
+  return (a[0] <= b[2] + TOUCH_EPS and b[0] <= a[2] + TOUCH_EPS and
+          a[1] <= b[3] + TOUCH_EPS and b[1] <= a[3] + TOUCH_EPS)
+
+
+@njit(cache=True)
+def aabb_resolve(sb, ob, direction):
+  """Displacement pushing box sb out of box ob against the motion direction.
+
+  sb and ob are (xmin, ymin, xmax, ymax) arrays. Returns (dx, dy).
+  """
+  dx, dy = 0., 0.
+  if direction == DOWN:
+    if ob[3] >= sb[1]: dy = ob[3] - sb[1] + 1e-5
+  elif direction == UP:
+    if sb[3] >= ob[1]: dy = -(sb[3] - ob[1] + 1e-5)
+  elif direction == RIGHT:
+    if sb[2] >= ob[0]: dx = -(sb[2] - ob[0] + 1e-5)
+  else:
+    if ob[2] >= sb[0]: dx = ob[2] - sb[0] + 1e-5
+  return dx, dy
+
+
+@njit(cache=True)
+def aabb_contact(sb, ob, direction):
+  """Displacement bringing box sb in contact with box ob along direction."""
+  dx, dy = 0., 0.
+  if direction == DOWN: dy = ob[3] - sb[1]
+  elif direction == UP: dy = ob[1] - sb[3]
+  elif direction == RIGHT: dx = ob[0] - sb[2]
+  else: dx = ob[2] - sb[0]
+  return dx, dy
+
+
+@njit(cache=True)
+def seg_hit(ax, ay, bx, by, cx, cy, dx, dy):
+  """Intersection of the segments AB and CD as (hit, x, y).
+
+  Parallel (and collinear) segments have no single crossing point and are not
+  a hit. Compiled kernels use this form, Python callers seg_intersect.
+  """
+  den = (bx - ax) * (dy - cy) - (by - ay) * (dx - cx)
+  if abs(den) < 1e-12: return False, 0., 0.
+  t = ((cx - ax) * (dy - cy) - (cy - ay) * (dx - cx)) / den
+  u = ((cx - ax) * (by - ay) - (cy - ay) * (bx - ax)) / den
+  if 0. <= t <= 1. and 0. <= u <= 1.:
+    return True, ax + t * (bx - ax), ay + t * (by - ay)
+  return False, 0., 0.
+
+
+@njit(cache=True)
+def seg_intersect(ax, ay, bx, by, cx, cy, dx, dy):
+  """Intersection point of the segments AB and CD as (x, y), or None."""
+  hit, x, y = seg_hit(ax, ay, bx, by, cx, cy, dx, dy)
+  return (x, y) if hit else None
+
+
+@njit(cache=True)
+def seg_circle(ax, ay, bx, by, cx, cy, r):
+  """Points where the segment AB crosses the circle (C, r), as an (n, 2) array.
+
+  Solves |A + t(B - A) - C|^2 = r^2 for t in [0, 1]; n is 0, 1 or 2 and a
+  tangent segment gives a single point.
+  """
+  dx, dy = bx - ax, by - ay
+  fx, fy = ax - cx, ay - cy
+  a = dx * dx + dy * dy
+  b = 2. * (dx * fx + dy * fy)
+  c = fx * fx + fy * fy - r * r
+  disc = b * b - 4. * a * c
+  pts = np.empty((2, 2))
+  n = 0
+  if a > 0. and disc >= 0.:
+    sq = math.sqrt(disc)
+    for t in ((-b - sq) / (2. * a), (-b + sq) / (2. * a)):
+      if 0. <= t <= 1. and not (n == 1 and sq == 0.):
+        pts[n, 0] = ax + t * dx
+        pts[n, 1] = ay + t * dy
+        n += 1
+  return pts[:n]
+
+
+@njit(cache=True)
+def seg_circle_extreme(ax, ay, bx, by, cx, cy, r, axis, largest):
+  """Largest (or smallest) coordinate along axis of the seg_circle points.
+
+  NaN when the segment does not cross the circle.
+  """
+  pts = seg_circle(ax, ay, bx, by, cx, cy, r)
+  if pts.shape[0] == 0: return np.nan
+  ext = pts[0, axis]
+  for i in range(1, pts.shape[0]):
+    if (pts[i, axis] > ext) == largest: ext = pts[i, axis]
+  return ext
+
+
+# shape kinds and modes of polygon_resolve
+CIRCLE, SQUARE, TRIANGLE = 0, 1, 2
+SHAPE_IDS = {"circle": CIRCLE, "square": SQUARE, "triangle": TRIANGLE}
+OVERLAP, CONTACT = 0, 1
+
+
+@njit(cache=True)
+def polygon_resolve(a_kind, av, ab, b_kind, bv, bb, direction, mode):
+  """Displacement (dx, dy) of polygon sprite a with respect to sprite b.
+
+  a and b are squares or triangles given by their kind, (n, 2) vertices and
+  (xmin, ymin, xmax, ymax) bounds. With mode OVERLAP the displacement pushes a
+  out of b against the motion direction, with mode CONTACT it moves a along
+  the direction until it touches b and is NaN when the two never meet.
+  """
+  if mode == OVERLAP:
+    if a_kind == SQUARE and b_kind == SQUARE: return aabb_resolve(ab, bb, direction)
+    if a_kind == SQUARE: return _square_triangle_overlap(av, ab, bv, bb, direction)
+    if b_kind == SQUARE: return _triangle_square_overlap(av, ab, bv, bb, direction)
+    return _triangle_triangle_overlap(av, ab, bv, bb, direction)
+  if a_kind == SQUARE and b_kind == SQUARE: return aabb_contact(ab, bb, direction)
+  if a_kind == SQUARE: gap = _square_triangle_gap(av, ab, bv, bb, direction)
+  elif b_kind == SQUARE: gap = _triangle_square_gap(av, ab, bv, bb, direction)
+  else: gap = _triangle_triangle_gap(av, ab, bv, bb, direction)
+  if direction == DOWN: return 0., -gap
+  elif direction == UP: return 0., gap
+  elif direction == RIGHT: return gap, 0.
+  return -gap, 0.
+
+
+@njit(cache=True)
+def _square_triangle_overlap(sv, sb, ov, ob, direction):
+  dx, dy = 0., 0.
+  if direction == DOWN:
+    if sv[3, 0] < ov[0, 0]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1], sv[3, 0], sv[3, 1], sv[3, 0], 1.)
+      if hit: dy = py - sv[3, 1]
+    elif sv[2, 0] > ov[0, 0]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1], sv[2, 0], sv[2, 1], sv[2, 0], 1.)
+      if hit: dy = py - sv[2, 1]
+    else: dy = ob[3] - sb[1]
+  elif direction == UP: dy = -(sb[3] - ob[1] + 1e-4)
+  elif direction == RIGHT:
+    if sb[1] >= ob[1]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1], 0., sv[3, 1], sv[3, 0], sv[3, 1])
+      if hit: dx = -(sv[3, 0] - px)
+    else: dx = -(sb[2] - ob[0])
+  else:
+    if sb[1] >= ob[1]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1], sv[2, 0], sv[2, 1], 1., sv[2, 1])
+      if hit: dx = px - sv[2, 0]
+    else: dx = ob[2] - sb[0]
+  return dx, dy
+
+
+@njit(cache=True)
+def _triangle_square_overlap(sv, sb, ov, ob, direction):
+  dx, dy = 0., 0.
+  if direction == DOWN: dy = ob[3] - sb[1] + 1e-5
+  elif direction == UP:
+    if ov[3, 0] < sv[0, 0]:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1], ov[3, 0], ov[3, 1], ov[3, 0], 1.)
+      if hit: dy = -(py - ov[3, 1] + 1e-5)
+    elif ov[2, 0] > sv[0, 0]:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1], ov[2, 0], ov[2, 1], ov[2, 0], 1.)
+      if hit: dy = -(py - ov[2, 1] + 1e-5)
+    else: dy = -(sb[3] - ob[1] + 1e-5)
+  elif direction == RIGHT:
+    if sb[1] >= ob[1]: dx = -(sb[2] - ob[0] + 1e-5)
+    else:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1], ov[2, 0], ov[2, 1], 1., ov[2, 1])
+      if hit: dx = -(px - ov[2, 0] + 1e-5)
+  else:
+    if sb[1] >= ob[1]: dx = ob[2] - sb[0] + 1e-5
+    else:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1], 0., ov[3, 1], ov[3, 0], ov[3, 1])
+      if hit: dx = ov[3, 0] - px + 1e-5
+  return dx, dy
+
+
+@njit(cache=True)
+def _triangle_triangle_overlap(sv, sb, ov, ob, direction):
+  dx, dy = 0., 0.
+  if direction == DOWN:
+    if sv[2, 0] < ov[0, 0]:
+      hit, px, py = seg_hit(sv[2, 0], sv[2, 1], sv[2, 0], 1., ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1])
+      if hit: dy = py - sv[2, 1]
+    elif sv[1, 0] > ov[0, 0]:
+      hit, px, py = seg_hit(sv[1, 0], sv[1, 1], sv[1, 0], 1., ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1])
+      if hit: dy = py - sv[1, 1]
+    elif sb[1] < ob[3]: dy = ob[3] - sb[1]
+  elif direction == UP:
+    if ov[2, 0] < sv[0, 0]:
+      hit, px, py = seg_hit(ov[2, 0], ov[2, 1], ov[2, 0], 1., sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1])
+      if hit: dy = -(py - ov[2, 1])
+    elif ov[1, 0] > sv[0, 0]:
+      hit, px, py = seg_hit(ov[1, 0], ov[1, 1], ov[1, 0], 1., sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1])
+      if hit: dy = -(py - ov[1, 1])
+    elif ob[1] < sb[3]: dy = -(sb[3] - ob[1])
+  elif direction == RIGHT:
+    if sb[1] > ob[1]:
+      hit, px, py = seg_hit(0., sv[2, 1], sv[2, 0], sv[2, 1], ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1])
+      if hit: dx = -(sv[2, 0] - px)
+    elif sb[1] < ob[1]:
+      hit, px, py = seg_hit(ov[1, 0], ov[1, 1], 1., ov[1, 1], sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1])
+      if hit: dx = -(px - ov[1, 0])
+    elif ob[0] < sb[2]: dx = -(sb[2] - ob[0])
+  else:
+    if sb[1] > ob[1]:
+      hit, px, py = seg_hit(sv[1, 0], sv[1, 1], 1., sv[1, 1], ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1])
+      if hit: dx = px - sv[1, 0]
+    elif sb[1] < ob[1]:
+      hit, px, py = seg_hit(0., ov[2, 1], ov[2, 0], ov[2, 1], sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1])
+      if hit: dx = ov[2, 0] - px
+    elif ob[2] > sb[0]: dx = ob[2] - sb[0]
+  return dx, dy
+
+
+@njit(cache=True)
+def _square_triangle_gap(sv, sb, ov, ob, direction):
+  if direction == DOWN:
+    if sv[3, 0] < ov[0, 0]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1], sv[3, 0], 0., sv[3, 0], sv[3, 1])
+      if hit: return sv[3, 1] - py
+    elif sv[2, 0] > ov[0, 0]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1], sv[2, 0], 0., sv[2, 0], sv[2, 1])
+      if hit: return sv[2, 1] - py
+    else: return sb[1] - ob[3]
+  elif direction == UP: return ob[1] - sb[3]
+  elif direction == RIGHT:
+    if sb[1] >= ob[1]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1], sv[3, 0], sv[3, 1], 1., sv[3, 1])
+      if hit: return px - sv[3, 0]
+    else: return ob[0] - sb[2]
+  else:
+    if sb[1] >= ob[1]:
+      hit, px, py = seg_hit(ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1], 0., sv[2, 1], sv[2, 0], sv[2, 1])
+      if hit: return sv[2, 0] - px
+    else: return sb[0] - ob[2]
+  return np.nan
+
+
+@njit(cache=True)
+def _triangle_square_gap(sv, sb, ov, ob, direction):
+  if direction == DOWN: return sb[1] - ob[3]
+  elif direction == UP:
+    if ov[3, 0] < sv[0, 0]:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1], ov[3, 0], 0., ov[3, 0], ov[3, 1])
+      if hit: return ov[3, 1] - py
+    elif ov[2, 0] > sv[0, 0]:
+      hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1], ov[2, 0], 0., ov[2, 0], ov[2, 1])
+      if hit: return ov[2, 1] - py
+    else: return ob[1] - sb[3]
+  elif direction == RIGHT:
+    if sb[1] >= ob[1]: return ob[0] - sb[2]
+    hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1], 0., ov[2, 1], ov[2, 0], ov[2, 1])
+    if hit: return ov[2, 0] - px
+  else:
+    if sb[1] >= ob[1]: return sb[0] - ob[2]
+    hit, px, py = seg_hit(sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1], ov[3, 0], ov[3, 1], 1., ov[3, 1])
+    if hit: return px - ov[3, 0]
+  return np.nan
+
+
+@njit(cache=True)
+def _triangle_triangle_gap(sv, sb, ov, ob, direction):
+  if direction == DOWN:
+    if sv[2, 0] < ov[0, 0]:
+      hit, px, py = seg_hit(sv[2, 0], 0., sv[2, 0], sv[2, 1], ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1])
+      if hit: return sv[2, 1] - py
+    elif sv[1, 0] > ov[0, 0]:
+      hit, px, py = seg_hit(sv[1, 0], 0., sv[1, 0], sv[1, 1], ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1])
+      if hit: return sv[1, 1] - py
+    else: return sb[1] - ob[3]
+  elif direction == UP:
+    if ov[2, 0] < sv[0, 0]:
+      hit, px, py = seg_hit(ov[2, 0], 0., ov[2, 0], ov[2, 1], sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1])
+      if hit: return ov[2, 1] - py
+    elif ov[1, 0] > sv[0, 0]:
+      hit, px, py = seg_hit(ov[1, 0], 0., ov[1, 0], ov[1, 1], sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1])
+      if hit: return ov[1, 1] - py
+    else: return ob[1] - sb[3]
+  elif direction == RIGHT:
+    if sb[1] > ob[1]:
+      hit, px, py = seg_hit(sv[2, 0], sv[2, 1], 1., sv[2, 1], ov[0, 0], ov[0, 1], ov[1, 0], ov[1, 1])
+      if hit: return px - sv[2, 0]
+    elif sb[1] < ob[1]:
+      hit, px, py = seg_hit(0., ov[1, 1], ov[1, 0], ov[1, 1], sv[0, 0], sv[0, 1], sv[2, 0], sv[2, 1])
+      if hit: return ov[1, 0] - px
+    else: return ob[0] - sb[2]
+  else:
+    if sb[1] > ob[1]:
+      hit, px, py = seg_hit(0., sv[1, 1], sv[1, 0], sv[1, 1], ov[0, 0], ov[0, 1], ov[2, 0], ov[2, 1])
+      if hit: return sv[1, 0] - px
+    elif sb[1] < ob[1]:
+      hit, px, py = seg_hit(ov[2, 0], ov[2, 1], 1., ov[2, 1], sv[0, 0], sv[0, 1], sv[1, 0], sv[1, 1])
+      if hit: return px - ov[2, 0]
+    else: return ob[2] - sb[0]
+  return np.nan
+
+
+@njit(cache=True)
+def circle_square_gap(cx, cy, r, ov, ob, direction):
+  """Free distance from the circle (C, r) to the square (ov, ob) along direction.
+
+  ov and ob are the vertices and bounds of the square; NaN when the two never
+  meet.
+  """
+  if direction == DOWN:
+    if ov[1, 0] > cx:
+      pts = seg_circle(ov[1, 0], ov[1, 1], ov[1, 0], cy, cx, cy, r)
+      if len(pts) == 1: return pts[0, 1] - ov[1, 1]
+    elif ov[0, 0] < cx:
+      pts = seg_circle(ov[0, 0], ov[0, 1], ov[0, 0], cy, cx, cy, r)
+      if len(pts) == 1: return pts[0, 1] - ov[0, 1]
+    else: return cy - r - ob[3]
+  elif direction == UP:
+    if ov[2, 0] > cx:
+      pts = seg_circle(ov[2, 0], cy, ov[2, 0], ov[2, 1], cx, cy, r)
+      if len(pts) == 1: return ov[2, 1] - pts[0, 1]
+    elif ov[3, 0] < cx:
+      pts = seg_circle(ov[3, 0], cy, ov[3, 0], ov[3, 1], cx, cy, r)
+      if len(pts) == 1: return ov[3, 1] - pts[0, 1]
+    else: return ob[1] - (cy + r)
+  elif direction == RIGHT:
+    if ov[1, 1] < cy:
+      pts = seg_circle(cx, ov[1, 1], ov[1, 0], ov[1, 1], cx, cy, r)
+      if len(pts) == 1: return ov[1, 0] - pts[0, 0]
+    elif ov[2, 1] > cy:
+      pts = seg_circle(cx, ov[2, 1], ov[2, 0], ov[2, 1], cx, cy, r)
+      if len(pts) == 1: return ov[2, 0] - pts[0, 0]
+    else: return ob[0] - (cx + r)
+  else:
+    if ov[0, 1] < cy:
+      pts = seg_circle(ov[0, 0], ov[0, 1], cx, ov[0, 0], cx, cy, r)
+      if len(pts) == 1: return pts[0, 0] - ov[0, 0]
+    elif ov[3, 1] > cy:
+      pts = seg_circle(ov[3, 0], ov[3, 1], cx, ov[3, 0], cx, cy, r)
+      if len(pts) == 1: return pts[0, 0] - ov[3, 0]
+    else: return cx - r - ob[2]
+  return np.nan
+
+
+@njit(cache=True)
+def square_circle_gap(sv, sb, cx, cy, r, direction):
+  """Free distance from the square (sv, sb) to the circle (C, r) along direction.
+
+  NaN when the two never meet.
+  """
+  if direction == DOWN:
+    if sv[2, 0] > cx:
+      pts = seg_circle(sv[2, 0], cy, sv[2, 0], sv[2, 1], cx, cy, r)
+      if len(pts) == 1: return sv[2, 1] - pts[0, 1]
+    elif sv[3, 0] < cx:
+      pts = seg_circle(sv[3, 0], cy, sv[3, 0], sv[3, 1], cx, cy, r)
+      if len(pts) == 1: return sv[3, 1] - pts[0, 1]
+    else: return sb[1] - (cy + r)
+  elif direction == UP:
+    if sv[1, 0] > cx:
+      pts = seg_circle(sv[1, 0], sv[1, 1], sv[1, 0], cy, cx, cy, r)
+      if len(pts) == 1: return pts[0, 1] - sv[1, 1]
+    elif sv[0, 0] < cx:
+      pts = seg_circle(sv[0, 0], sv[0, 1], sv[0, 0], cy, cx, cy, r)
+      if len(pts) == 1: return pts[0, 1] - sv[0, 1]
+    else: return cy - r - sb[3]
+  elif direction == RIGHT:
+    if sv[3, 1] > cy:
+      pts = seg_circle(sv[3, 0], sv[3, 1], cx, sv[3, 1], cx, cy, r)
+      if len(pts) == 1: return pts[0, 0] - sv[3, 0]
+    elif sv[0, 1] < cy:
+      pts = seg_circle(sv[0, 0], sv[0, 1], cx, sv[0, 1], cx, cy, r)
+      if len(pts) == 1: return pts[0, 0] - sv[0, 0]
+    else: return cx - r - sb[2]
+  else:
+    if sv[2, 1] > cy:
+      pts = seg_circle(cx, sv[2, 1], sv[2, 0], sv[2, 1], cx, cy, r)
+      if len(pts) == 1: return sv[2, 0] - pts[0, 0]
+    elif sv[1, 1] < cy:
+      pts = seg_circle(cx, sv[1, 1], sv[1, 0], sv[1, 1], cx, cy, r)
+      if len(pts) == 1: return sv[1, 0] - pts[0, 0]
+    else: return sb[0] - (cx + r)
+  return np.nan
@@ -1,9 +1,15 @@
+import math
 import numpy as np
 import collections
 from spriteworld import constants
+from spriteworld._overlap_kernels import DOWN, UP, RIGHT, LEFT, DIR
+from spriteworld._overlap_kernels import C5PI4, S5PI4, C7PI4, S7PI4
+from spriteworld._overlap_kernels import bboxes_touch
+from spriteworld._overlap_kernels import seg_circle, seg_circle_extreme, seg_intersect
+from spriteworld._overlap_kernels import polygon_resolve, SHAPE_IDS, OVERLAP, CONTACT
+from spriteworld._overlap_kernels import circle_square_gap, square_circle_gap
 from matplotlib import path as mpl_path
-from matplotlib import transforms as mpl_transforms
-from shapely.geometry import LineString, Point, Polygon
+from shapely.geometry import LineString, Polygon
 
 FACTOR_NAMES = (
     'x',  # x-position of sprite center-of-mass (float)
@@ -18,7 +24,64 @@ FACTOR_NAMES = (
     'y_vel',  # y-component of velocity (float)
 )
 
+# axis and sign of the motion for each direction code
+_AXIS_SIGN = ((1, -1.), (1, 1.), (0, 1.), (0, -1.))
+
+# unit vertices of each shape as read-only float64 arrays, see _unit_shape()
+_UNIT_SHAPE_CACHE = {}
+
+def _unit_shape(shape):
+  vertices = _UNIT_SHAPE_CACHE.get(shape)
+  if vertices is None:
+    vertices = np.array(constants.SHAPES[shape], dtype=np.float64)
+    vertices.flags.writeable = False
+    _UNIT_SHAPE_CACHE[shape] = vertices
+  return vertices
+
+def _rotation(angle):
+  """2x2 rotation matrix for an angle in degrees."""
+  theta = np.deg2rad(angle)
+  c, s = np.cos(theta), np.sin(theta)
+  return np.array([[c, -s], [s, c]])
+
+def _ray_circle(px, py, dx, dy, cx, cy, r):
+  """Chord of the segment P + t*d, t in [0, 1], inside the circle (C, r).
+
+  Solves |P + t*d - C|^2 = r^2 for t and returns the (t_in, t_out) parameters
+  clipped to the segment, or None if the segment does not cross the circle.
+  """
+  fx, fy = px - cx, py - cy
+  a = dx * dx + dy * dy
+  b = 2 * (dx * fx + dy * fy)
+  c = fx * fx + fy * fy - r * r
+  disc = b * b - 4 * a * c
+  if a == 0 or disc < 0: return None
+  sq = math.sqrt(disc)
+  t0 = max((-b - sq) / (2 * a), 0.)
+  t1 = min((-b + sq) / (2 * a), 1.)
+  if t0 >= t1: return None
+  return t0, t1
+
+def _other_endpoint(px, py, qx, qy, cx, cy, r, exclude):
+  """First end of the chord of segment PQ in the circle (C, r) that is not exclude.
+
+  The chord ends are taken in the P to Q order and returned as (x, y), or None
+  when there is no such end.
+  """
+  span = _ray_circle(px, py, qx - px, qy - py, cx, cy, r)
+  if span is None: return None
+  ex, ey = exclude[0], exclude[1]
+  for t in span:
+    x, y = (qx, qy) if t == 1. else (px + t * (qx - px), py + t * (qy - py))
+    if abs(x - ex) + abs(y - ey) > 1e-12:
+      return x, y
+  return None
+
 class AbstractSprite(object):
+  __slots__ = ('_position', '_shape', '_angle', '_scale', '_color', '_velocity',
+               'MIN', 'MAX', 'prop', '_geom_cache_stamp', '_geom_cache_key',
+               '_geom_cache_data', '_arena', '_arena_idx', '_centered_vertices',
+               '_centered_path_cache', '_shape_id')
 
   def __init__(self,
                x=0.5,
@@ -51,975 +114,493 @@ class AbstractSprite(object):
       x_vel: Float. x-velocity.
       y_vel: Float. y-velocity.
     """
-    self._position = np.array([x, y])
+    # positions are float32: plenty for a unit frame, the derived geometry
+    # (vertices, bounds, areas) is still computed in float64
+    self._position = np.array([x, y], dtype=np.float32)
     self._shape = shape
+    # integer id of the shape for the compiled kernels, see SHAPE_IDS
+    self._shape_id = SHAPE_IDS.get(shape, -1)
     self._angle = angle
     self._scale = scale
-    self._color = (c0, c1, c2)
-    self._velocity = (x_vel, y_vel)
+    self._color = np.array([c0, c1, c2], dtype=np.float32)
+    self._velocity = np.array([x_vel, y_vel], dtype=np.float64)
     self.MIN = 0
     self.MAX = 0
 
     # geometrical property of the shape (e.g radius or side)
     self.prop = None
+    # derived geometry (vertices, polygon, ...) is cached until the sprite
+    # moves or its centered path changes, see _geom_cache()
+    self._geom_cache_stamp = 0
+    self._geom_cache_key = None
+    self._geom_cache_data = None
+    # SpriteArena holding this sprite's row, if any, see _bind()
+    self._arena = None
+    self._arena_idx = None
     self._reset_centered_path()
 
   def _reset_centered_path(self):
-    path = mpl_path.Path(constants.SHAPES[self._shape])
-    scale_rotate = (
-        mpl_transforms.Affine2D().scale(self._scale) +
-        mpl_transforms.Affine2D().rotate_deg(self._angle))
-    self._centered_path = scale_rotate.transform_path(path)
+    # built from the unit shape on every change of shape, angle or scale, so
+    # successive updates do not compound
+    scale_rotate = self._scale * _rotation(self._angle)
+    self._set_centered_vertices(_unit_shape(self._shape) @ scale_rotate.T)
+
+  def _set_centered_vertices(self, vertices):
+    self._centered_vertices = vertices
+    self._centered_path_cache = None
+    self._geom_cache_stamp += 1
+    if self._arena is not None: self._arena.refresh(self._arena_idx)
+
+  def _bind(self, arena, idx):
+    # share the position with row idx of the arena, updates go both ways
+    self._arena, self._arena_idx = arena, idx
+    self._position = arena.positions[idx]
+
+  @property
+  def _centered_path(self):
+    # matplotlib path, only built for the callers that need one
+    if self._centered_path_cache is None:
+      self._centered_path_cache = mpl_path.Path(self._centered_vertices)
+    return self._centered_path_cache
+
+  def _geom_cache(self):
+    # _position is mutated in place all over the collision code, so its value
+    # is part of the key; the stamp covers changes of the centered path.
+    key = (self._geom_cache_stamp, self._position[0], self._position[1])
+    if key != self._geom_cache_key:
+      self._geom_cache_key = key
+      self._geom_cache_data = {}
+    return self._geom_cache_data
+
+  def _radius(self):
+    # fall back to the polygon area when the radius has not been stored
+    if self.prop is not None: return self.prop
+    return np.sqrt(self.polygon.area / np.pi)
 
   ################## Handle Overlaps ####################################
 
   def _circle_circle_overlap(self, other, direction):
-    line1 = LineString([self.position, other.position])
-    p1 = line1.intersection(self.polygon)
-    p1 = Point([p for p in list(p1.coords) if Point(p) != Point(self.position)][0])
-    if direction == "down":
-      line2 = LineString([p1, (p1.x, 1)])
-      p2 = line2.intersection(other.polygon)
-      if p2.__class__.__name__ == "LineString" and list(p2.coords):
-        p2 = Point([p for p in list(p2.coords) if Point(p) != p1][0])
-        self._position[1] += p2.y - p1.y 
-    elif direction == "up":
-      line2 = LineString([(p1.x, 0), p1])
-      p2 = line2.intersection(other.polygon)
-      if p2.__class__.__name__ == "LineString" and list(p2.coords):
-        p2 = Point([p for p in list(p2.coords) if Point(p) != p1][0])
-        self._position[1] -= p1.y - p2.y
-    elif direction == "right":
-      line2 = LineString([(0, p1.y), p1])
-      p2 = line2.intersection(other.polygon)            
-      if p2.__class__.__name__ == "LineString" and list(p2.coords):
-        p2 = Point([p for p in list(p2.coords) if Point(p) != p1][0])
-        self._position[0] -= p1.x - p2.x
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    r1, r2 = self._radius(), other._radius()
+    sx, sy = self._position
+    ox, oy = other._position
+    dist = math.hypot(ox - sx, oy - sy)
+    if dist == 0: return
+    # the circles touch along the line joining their centers
+    k = min(r1, dist) / dist
+    p1x, p1y = sx + k * (ox - sx), sy + k * (oy - sy)
+    if direction == DOWN:
+      span = _ray_circle(p1x, p1y, 0, 1 - p1y, ox, oy, r2)
+      if span:
+        t = span[0] if span[0] > 0 else span[1]
+        self._position[1] += t * (1 - p1y)
+    elif direction == UP:
+      span = _ray_circle(p1x, 0, 0, p1y, ox, oy, r2)
+      if span: self._position[1] -= p1y - span[0] * p1y
+    elif direction == RIGHT:
+      span = _ray_circle(0, p1y, p1x, 0, ox, oy, r2)
+      if span: self._position[0] -= p1x - span[0] * p1x
     else:
-      line2 = LineString([p1, (1, p1.y)])
-      p2 = line2.intersection(other.polygon)
-      if p2.__class__.__name__ == "LineString" and list(p2.coords):
-        p2 = Point([p for p in list(p2.coords) if Point(p) != p1][0])
-        self._position[0] += p2.x - p1.x
+      span = _ray_circle(p1x, p1y, 1 - p1x, 0, ox, oy, r2)
+      if span:
+        t = span[0] if span[0] > 0 else span[1]
+        self._position[0] += t * (1 - p1x)
 
   def _circle_square_overlap(self, other, direction):
-    circle = self.contours
-    if direction == "down":
-      if other.vertices[1][0] > self.x:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] += other.vertices[1][1] - p.y
-        except: pass
-      elif other.vertices[0][0] < self.x:
-        line1 = LineString([other.vertices[0], other.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] += other.vertices[0][1] - p.y
-        except: pass
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    other_vert = other.vertices
+    other_bounds = other.bounds
+    if direction == DOWN:
+      if other_vert[1][0] > self.x:
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[1] += other_vert[1][1] - pts[0][1]
+      elif other_vert[0][0] < self.x:
+        pts = seg_circle(other_vert[0][0], other_vert[0][1], other_vert[3][0], other_vert[3][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[1] += other_vert[0][1] - pts[0][1]
       else: 
-        self._position[1] += other.bounds[3] - (self.y - self.prop) + 1e-5
-    elif direction == "up":
-      if other.vertices[2][0] > self.x:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= p.y - other.vertices[2][1]
-        except: pass
-      elif other.vertices[3][0] < self.x:
-        line1 = LineString([other.vertices[0], other.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= p.y - other.vertices[2][1]
-        except: pass
+        self._position[1] += other_bounds[3] - (self.y - self.prop) + 1e-5
+    elif direction == UP:
+      if other_vert[2][0] > self.x:
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[1] -= pts[0][1] - other_vert[2][1]
+      elif other_vert[3][0] < self.x:
+        pts = seg_circle(other_vert[0][0], other_vert[0][1], other_vert[3][0], other_vert[3][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[1] -= pts[0][1] - other_vert[2][1]
       else: 
-        self._position[1] -= (self.y + self.prop) - other.bounds[1] + 1e-5
-    elif direction == "right":
-      if other.vertices[1][1] < self.y:
-        line1 = LineString([other.vertices[0], other.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= p.x - other.vertices[1][0]
-        except: pass
-      elif other.vertices[2][1] > self.y:
-        line1 = LineString([other.vertices[2], other.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= p.x - other.vertices[2][0]
-        except: pass
-      else:
-        self._position[0] -= (self.x + self.prop) - other.bounds[0]  + 1e-5
+        self._position[1] -= (self.y + self.prop) - other_bounds[1] + 1e-5
+    elif direction == RIGHT:
+      if other_vert[1][1] < self.y:
+        pts = seg_circle(other_vert[0][0], other_vert[0][1], other_vert[1][0], other_vert[1][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] -= pts[0][0] - other_vert[1][0]
+      elif other_vert[2][1] > self.y:
+        pts = seg_circle(other_vert[2][0], other_vert[2][1], other_vert[3][0], other_vert[3][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] -= pts[0][0] - other_vert[2][0]
+      else:
+        self._position[0] -= (self.x + self.prop) - other_bounds[0]  + 1e-5
     else:
-      if other.vertices[0][1] < self.y:
-        line1 = LineString([other.vertices[0], other.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] += other.vertices[0][0] - p.x
-        except: pass
-      elif other.vertices[3][1] > self.y:
-        line1 = LineString([other.vertices[2], other.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[0] += other.vertices[3][0] - p.x
-        except: pass
+      if other_vert[0][1] < self.y:
+        pts = seg_circle(other_vert[0][0], other_vert[0][1], other_vert[1][0], other_vert[1][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] += other_vert[0][0] - pts[0][0]
+      elif other_vert[3][1] > self.y:
+        pts = seg_circle(other_vert[2][0], other_vert[2][1], other_vert[3][0], other_vert[3][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] += other_vert[3][0] - pts[0][0]
       else:
-        self._position[0] += other.bounds[2] - (self.x - self.prop)  + 1e-5
+        self._position[0] += other_bounds[2] - (self.x - self.prop)  + 1e-5
 
   def _square_circle_overlap(self, other, direction):
-    circle = other.contours
-    if direction == "down":
-      if self.vertices[3][0] < other.x:
-        line1 = LineString([self.vertices[0], self.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] += p.y - self.vertices[3][1]
-        except: pass
-      elif self.vertices[2][0] > other.x:
-        line1 = LineString([self.vertices[1], self.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] += p.y - self.vertices[2][1]
-        except: pass
-      else: self._position[1] += (other.y + other.prop) - self.bounds[1] + 1e-5
-    elif direction == "up":
-      if self.vertices[1][0] > other.x:
-        line1 = LineString([self.vertices[1], self.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= self.vertices[1][1] - p.y
-        except: pass
-      elif self.vertices[0][0] < other.x:
-        line1 = LineString([self.vertices[0], self.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= self.vertices[0][1] - p.y
-        except: pass
-      else:
-        self._position[1] -= self.bounds[3] - other.bounds[1] + 1e-5
-    elif direction == "right":
-      if self.vertices[0][1] < other.y:
-        line1 = LineString([self.vertices[0], self.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= self.vertices[0][0] - p.x
-        except: pass
-      elif self.vertices[3][1] > other.y:
-        line1 = LineString([self.vertices[2], self.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= self.vertices[3][0] - p.x
-        except: pass
-      else: self._position[0] -= self.bounds[2] - (other.x - other.prop) + 1e-5
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    self_vert = self.vertices
+    self_bounds = self.bounds
+    other_bounds = other.bounds
+    if direction == DOWN:
+      if self_vert[3][0] < other.x:
+        pts = seg_circle(self_vert[0][0], self_vert[0][1], self_vert[3][0], self_vert[3][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[1] += pts[0][1] - self_vert[3][1]
+      elif self_vert[2][0] > other.x:
+        pts = seg_circle(self_vert[1][0], self_vert[1][1], self_vert[2][0], self_vert[2][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[1] += pts[0][1] - self_vert[2][1]
+      else: self._position[1] += (other.y + other.prop) - self_bounds[1] + 1e-5
+    elif direction == UP:
+      if self_vert[1][0] > other.x:
+        pts = seg_circle(self_vert[1][0], self_vert[1][1], self_vert[2][0], self_vert[2][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[1] -= self_vert[1][1] - pts[0][1]
+      elif self_vert[0][0] < other.x:
+        pts = seg_circle(self_vert[0][0], self_vert[0][1], self_vert[3][0], self_vert[3][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[1] -= self_vert[0][1] - pts[0][1]
+      else:
+        self._position[1] -= self_bounds[3] - other_bounds[1] + 1e-5
+    elif direction == RIGHT:
+      if self_vert[0][1] < other.y:
+        pts = seg_circle(self_vert[0][0], self_vert[0][1], self_vert[1][0], self_vert[1][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[0] -= self_vert[0][0] - pts[0][0]
+      elif self_vert[3][1] > other.y:
+        pts = seg_circle(self_vert[2][0], self_vert[2][1], self_vert[3][0], self_vert[3][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[0] -= self_vert[3][0] - pts[0][0]
+      else: self._position[0] -= self_bounds[2] - (other.x - other.prop) + 1e-5
     else:
-      if self.vertices[1][1] < other.y:
-        line1 = LineString([self.vertices[0], self.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] += p.x - self.vertices[1][0]
-        except: pass
-      elif self.vertices[2][1] > other.y:
-        line1 = LineString([self.vertices[2], self.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[0] += p.x - self.vertices[2][0]
-        except: pass
-      else: self._position[0] += (other.x + other.prop) - self.bounds[0] + 1e-5
+      if self_vert[1][1] < other.y:
+        pts = seg_circle(self_vert[0][0], self_vert[0][1], self_vert[1][0], self_vert[1][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[0] += pts[0][0] - self_vert[1][0]
+      elif self_vert[2][1] > other.y:
+        pts = seg_circle(self_vert[2][0], self_vert[2][1], self_vert[3][0], self_vert[3][1], other.x, other.y, other.prop)
+        if len(pts) == 1: self._position[0] += pts[0][0] - self_vert[2][0]
+      else: self._position[0] += (other.x + other.prop) - self_bounds[0] + 1e-5
 
   def _square_square_overlap(self, other, direction):
-    if direction == "down":
-      if other.bounds[3] >= self.bounds[1]:
-        self._position[1] += other.bounds[3] - self.bounds[1] + 1e-5
-    elif direction == "up":
-      if self.bounds[3] >= other.bounds[1]:
-        self._position[1] -= self.bounds[3] - other.bounds[1] + 1e-5
-    elif direction == "right":
-      if self.bounds[2] >= other.bounds[0]:  
-        self._position[0] -= self.bounds[2] - other.bounds[0] + 1e-5
-    else:
-      if other.bounds[2] >= self.bounds[0]:
-        self._position[0] += other.bounds[2] - self.bounds[0] + 1e-5
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    dx, dy = self._polygon_resolve(other, direction, OVERLAP)
+    self._position[0] += dx
+    self._position[1] += dy
 
   def _circle_triangle_overlap(self, other, direction):
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    self_vert = self.vertices
+    other_vert = other.vertices
+    self_bounds = self.bounds
+    other_bounds = other.bounds
     r = self.prop
-    if direction == "down":
-      if not (self.x - r >= other.vertices[0][0] or self.x + r <= other.vertices[0][0]):
-        if other.bounds[3] > self.y - r: self._position[1] += other.bounds[3] - (self.y - r)  + 1e-5
-      else:
-        if self.x <= other.vertices[0][0]:
-          p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[1]])
-        elif self.x > other.vertices[0][0]:
-          p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[2]])
-        line1 = LineString([p, (p[0],1)])
-        line3 = LineString([other.vertices[0], (other.vertices[0][0], other.y)])
+    if direction == DOWN:
+      if not (self.x - r >= other_vert[0][0] or self.x + r <= other_vert[0][0]):
+        if other_bounds[3] > self.y - r: self._position[1] += other_bounds[3] - (self.y - r)  + 1e-5
+      else:
+        if self.x <= other_vert[0][0]:
+          p = (self.x + r * C7PI4, self.y + r * S7PI4)
+          q = other_vert[1]
+        elif self.x > other_vert[0][0]:
+          p = (self.x + r * C5PI4, self.y + r * S5PI4)
+          q = other_vert[2]
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          point = line1.intersection(line2)
-          d1 = point.y - p[1]  + 1e-5
-        if line3.intersects(self.contours):
-          d2 = other.vertices[0][1] - line3.intersection(self.contours).bounds[1] + 1e-5
+        point = seg_intersect(p[0], p[1], p[0], 1., other_vert[0][0], other_vert[0][1], q[0], q[1])
+        if point is not None:
+          d1 = point[1] - p[1]  + 1e-5
+        ext = seg_circle_extreme(other_vert[0][0], other_vert[0][1], other_vert[0][0], other.y, self.x, self.y, self.prop, 1, False)
+        if not math.isnan(ext):
+          d2 = other_vert[0][1] - ext + 1e-5
         self._position[1] += max(d1, d2)   
-    elif direction == "up":
-      if other.vertices[2][0] < self.x:
-        line1 = LineString([other.vertices[2], (other.vertices[2][0], 1)])
-        point = line1.intersection(self.contours)        
-        try: self._position[1] -= point.bounds[3]  - other.vertices[2][1]
-        except: pass
-      elif other.vertices[1][0] > self.x:
-        line1 = LineString([other.vertices[1], (other.vertices[1][0], 1)])
-        point = line1.intersection(self.contours)
-        try: self._position[1] -= point.bounds[3]  - other.vertices[1][1] 
-        except: pass
-      else: self._position[1] -= self.bounds[3] - other.bounds[1]
-    elif direction == "right":
-      if self.y - r <= other.vertices[0][1] and self.y - r >= other.vertices[1][1]:
-        p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([(0, self.y), p]) 
-        line2 = LineString([other.vertices[0], other.vertices[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= p[0] - point.x 
-        except: pass
-      else:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: self._position[0] -= p.x - other.vertices[1][0]  + 1e-5
-        except: pass
+    elif direction == UP:
+      if other_vert[2][0] < self.x:
+        ext = seg_circle_extreme(other_vert[2][0], other_vert[2][1], other_vert[2][0], 1., self.x, self.y, self.prop, 1, True)
+        if not math.isnan(ext): self._position[1] -= ext - other_vert[2][1]
+      elif other_vert[1][0] > self.x:
+        ext = seg_circle_extreme(other_vert[1][0], other_vert[1][1], other_vert[1][0], 1., self.x, self.y, self.prop, 1, True)
+        if not math.isnan(ext): self._position[1] -= ext - other_vert[1][1]
+      else: self._position[1] -= self_bounds[3] - other_bounds[1]
+    elif direction == RIGHT:
+      if self.y - r <= other_vert[0][1] and self.y - r >= other_vert[1][1]:
+        p = (self.x + r * C7PI4, self.y + r * S7PI4)
+        point = seg_intersect(0., self.y, p[0], p[1], other_vert[0][0], other_vert[0][1], other_vert[1][0], other_vert[1][1])
+        if point is not None: self._position[0] -= p[0] - point[0]
+      else:
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] -= pts[0][0] - other_vert[1][0]  + 1e-5
     else:
-      if self.y - r <= other.vertices[0][1] and self.y -r >= other.vertices[2][1]:
-        p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([p, (1, self.y)])
-        line2 = LineString([other.vertices[0], other.vertices[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] += point.x - p[0]
-        except: pass
+      if self.y - r <= other_vert[0][1] and self.y -r >= other_vert[2][1]:
+        p = (self.x + r * C5PI4, self.y + r * S5PI4)
+        point = seg_intersect(p[0], p[1], 1., self.y, other_vert[0][0], other_vert[0][1], other_vert[2][0], other_vert[2][1])
+        if point is not None: self._position[0] += point[0] - p[0]
       else:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: self._position[0] += other.vertices[2][0] - p.x  + 1e-5
-        except: pass
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] += other_vert[2][0] - pts[0][0]  + 1e-5
 
   def _square_triangle_overlap(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[3][0] < other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([self_vert[3], (self_vert[3][0], 1)])
-        point = line1.intersection(line2)
-        try: self._position[1] += point.y  - self_vert[3][1]
-        except: pass
-      elif self_vert[2][0] > other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([self_vert[2], (self_vert[2][0], 1)])
-        point = line1.intersection(line2)
-        try: self._position[1] += point.y  - self_vert[2][1] 
-        except: pass
-      else: self._position[1] += other.bounds[3] - self.bounds[1]
-    elif direction == "up": self._position[1] -= self.bounds[3] - other.bounds[1] + 1e-4
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]: 
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([(0, self_vert[3][1]), self_vert[3]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= self_vert[3][0] - point.x
-        except: pass
-      else: self._position[0] -= self.bounds[2] - other.bounds[0]
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([self_vert[2], (1, self_vert[2][1])])
-        point = line1.intersection(line2)
-        try: self._position[0] += point.x - self_vert[2][0]
-        except: pass
-      else: self._position[0] += other.bounds[2] - self.bounds[0]
-    del self_vert, other_vert
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    dx, dy = self._polygon_resolve(other, direction, OVERLAP)
+    self._position[0] += dx
+    self._position[1] += dy
 
   def _triangle_circle_overlap(self, other, direction):
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    self_vert = self.vertices
+    self_bounds = self.bounds
+    other_bounds = other.bounds
     r = other.prop
-    if direction == "down":
-      if self.vertices[2][0] < other.x:
-        line1 = LineString([self.vertices[2], (self.vertices[2][0], 1)])
-        point = line1.intersection(other.contours)        
-        try: self._position[1] += point.bounds[3]  - self.vertices[2][1]
-        except: pass
-      elif self.vertices[1][0] > other.x:
-        line1 = LineString([self.vertices[1], (self.vertices[1][0], 1)])
-        point = line1.intersection(other.contours)
-        try: self._position[1] += point.bounds[3]  - self.vertices[1][1] 
-        except: pass
-      else: self._position[1] += other.bounds[3] - self.bounds[1]
-    elif direction == "up":
-      if not (other.x + 0.02 <= self.vertices[0][0] or other.x - 0.02 >= self.vertices[0][0]):   
-        if self.bounds[3] > other.position[1] - r:
-          self.position[1] -= self.bounds[3] - (other.position[1] - r) + 1e-5
-      else:
-        if other.x <= self.vertices[0][0]:
-          p = other.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-          line2 = LineString([self.vertices[0], self.vertices[1]])
-        if other.x > self.vertices[0][0]:
-          p = other.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-          line2 = LineString([self.vertices[0], self.vertices[2]])
-        line1 = LineString([p, (p[0],1)])
-        line3 = LineString([self.vertices[0], (self.vertices[0][0], self.y)])
+    if direction == DOWN:
+      if self_vert[2][0] < other.x:
+        ext = seg_circle_extreme(self_vert[2][0], self_vert[2][1], self_vert[2][0], 1., other.x, other.y, other.prop, 1, True)
+        if not math.isnan(ext): self._position[1] += ext - self_vert[2][1]
+      elif self_vert[1][0] > other.x:
+        ext = seg_circle_extreme(self_vert[1][0], self_vert[1][1], self_vert[1][0], 1., other.x, other.y, other.prop, 1, True)
+        if not math.isnan(ext): self._position[1] += ext - self_vert[1][1]
+      else: self._position[1] += other_bounds[3] - self_bounds[1]
+    elif direction == UP:
+      if not (other.x + 0.02 <= self_vert[0][0] or other.x - 0.02 >= self_vert[0][0]):   
+        if self_bounds[3] > other.position[1] - r:
+          self.position[1] -= self_bounds[3] - (other.position[1] - r) + 1e-5
+      else:
+        if other.x <= self_vert[0][0]:
+          p = (other.x + r * C7PI4, other.y + r * S7PI4)
+          q = self_vert[1]
+        if other.x > self_vert[0][0]:
+          p = (other.x + r * C5PI4, other.y + r * S5PI4)
+          q = self_vert[2]
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          point = line1.intersection(line2)
-          d1 = point.y - p[1]  + 1e-5
-        if line3.intersects(other.contours):
-          d2 = self.vertices[0][1] - line3.intersection(other.contours).bounds[1] + 1e-5
+        point = seg_intersect(p[0], p[1], p[0], 1., self_vert[0][0], self_vert[0][1], q[0], q[1])
+        if point is not None:
+          d1 = point[1] - p[1]  + 1e-5
+        ext = seg_circle_extreme(self_vert[0][0], self_vert[0][1], self_vert[0][0], self.y, other.x, other.y, other.prop, 1, False)
+        if not math.isnan(ext):
+          d2 = self_vert[0][1] - ext + 1e-5
         self._position[1] -= max(d1, d2) # if min(d1, d2) != 1 else 0
-    elif direction == "right":
-      if self.vertices[2][1] >= other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([(0, self.vertices[2][1]), self.vertices[2]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(self.vertices[2])]
-        if p1: self._position[0] -= self.vertices[2][0] - p1[0][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([(0, self.vertices[0][1]), self.vertices[0]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(self.vertices[0])]
-        if p1: self._position[0] -= self.vertices[0][0] - p1[0][0]
-      else:
-        p = other.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([p, (1, p[1])])
-        line2 = LineString([self.vertices[0], self.vertices[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - p[0]  + 1e-5
-        except: pass
+    elif direction == RIGHT:
+      if self_vert[2][1] >= other.y + r * S5PI4:
+        p1 = _other_endpoint(0., self_vert[2][1], self_vert[2][0], self_vert[2][1], other.x, other.y, other.prop, self_vert[2])
+        if p1 is not None: self._position[0] -= self_vert[2][0] - p1[0]
+      elif self_vert[0][1] < other.y + r * S5PI4:
+        p1 = _other_endpoint(0., self_vert[0][1], self_vert[0][0], self_vert[0][1], other.x, other.y, other.prop, self_vert[0])
+        if p1 is not None: self._position[0] -= self_vert[0][0] - p1[0]
+      else:
+        p = (other.x + r * C5PI4, other.y + r * S5PI4)
+        point = seg_intersect(p[0], p[1], 1., p[1], self_vert[0][0], self_vert[0][1], self_vert[2][0], self_vert[2][1])
+        if point is not None: self._position[0] -= point[0] - p[0]  + 1e-5
     else:
-      if self.vertices[1][1] >= other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[1], (1, self.vertices[1][1])]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(self.vertices[1])]
-        if p1: self._position[0] += p1[0][0] - self.vertices[1][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[0], (1, self.vertices[0][1])]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(self.vertices[0])]
-        if p1: self._position[0] += p1[0][0] - self.vertices[0][0] + 1e-5
+      if self_vert[1][1] >= other.y + r * S7PI4:
+        p1 = _other_endpoint(self_vert[1][0], self_vert[1][1], 1., self_vert[1][1], other.x, other.y, other.prop, self_vert[1])
+        if p1 is not None: self._position[0] += p1[0] - self_vert[1][0]
+      elif self_vert[0][1] < other.y + r * S7PI4:
+        p1 = _other_endpoint(self_vert[0][0], self_vert[0][1], 1., self_vert[0][1], other.x, other.y, other.prop, self_vert[0])
+        if p1 is not None: self._position[0] += p1[0] - self_vert[0][0] + 1e-5
       else:
-        p = other.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([(0, p[1]), p])
-        line2 = LineString([self.vertices[0], self.vertices[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] += p[0] - point.x + 1e-5
-        except: pass
+        p = (other.x + r * C7PI4, other.y + r * S7PI4)
+        point = seg_intersect(0., p[1], p[0], p[1], self_vert[0][0], self_vert[0][1], self_vert[1][0], self_vert[1][1])
+        if point is not None: self._position[0] += p[0] - point[0] + 1e-5
 
   def _triangle_square_overlap(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down": self._position[1] += other.bounds[3] - self.bounds[1] + 1e-5
-    elif direction == "up":
-      if other_vert[3][0] < self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([other_vert[3], (other_vert[3][0], 1)])
-        point = line1.intersection(line2)
-        try: self._position[1] -= point.y - other_vert[3][1] + 1e-5
-        except: pass
-      elif other_vert[2][0] > self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([other_vert[2], (other_vert[2][0], 1)])
-        point = line1.intersection(line2)
-        try: self._position[1] -= point.y - other_vert[2][1] + 1e-5
-        except: pass
-      else: self._position[1] -= self.bounds[3] - other.bounds[1] + 1e-5
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]:
-        self._position[0] -= self.bounds[2] - other.bounds[0] + 1e-5
-      else:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([other_vert[2], (1, other_vert[2][1])])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - other_vert[2][0] + 1e-5
-        except: pass
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        self._position[0] += other.bounds[2] - self.bounds[0] + 1e-5
-      else:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([(0, other_vert[3][1]), other_vert[3]])
-        point = line1.intersection(line2)
-        try: self._position[0] += other_vert[3][0] - point.x + 1e-5
-        except: pass
-    del self_vert, other_vert
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    dx, dy = self._polygon_resolve(other, direction, OVERLAP)
+    self._position[0] += dx
+    self._position[1] += dy
 
-  
   def _triangle_triangle_overlap(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[2][0] < other_vert[0][0]:
-        line1 = LineString([self_vert[2], (self_vert[2][0], 1)])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[1] += point.y - self_vert[2][1] 
-        except: pass
-      elif self_vert[1][0] > other_vert[0][0]:
-        line1 = LineString([self_vert[1], (self_vert[1][0], 1)])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] += point.y - self_vert[1][1]
-        except: pass
-      else:
-        if self.bounds[1] < other.bounds[3]:
-          self._position[1] += other.bounds[3] - self.bounds[1]
-    elif direction == "up":
-      if other_vert[2][0] < self_vert[0][0]:
-        line1 = LineString([other_vert[2], (other_vert[2][0], 1)])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= point.y - other_vert[2][1] 
-        except: pass
-      elif other_vert[1][0] > self_vert[0][0]:
-        line1 = LineString([other_vert[1], (other_vert[1][0], 1)])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= point.y- other_vert[1][1]
-        except: pass
-      else:
-        if other.bounds[1] < self.bounds[3]:
-          self._position[1] -= self.bounds[3] - other.bounds[1]
-    elif direction == "right":
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([(0, self_vert[2][1]), self_vert[2]])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= self_vert[2][0] - point.x
-        except: pass
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([other_vert[1], (1, other_vert[1][1])])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - other_vert[1][0]
-        except: pass
-      else:
-        if other.bounds[0] < self.bounds[2]: self._position[0] -= self.bounds[2] - other.bounds[0]
-    else:
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([self_vert[1], (1, self_vert[1][1])])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] += point.x - self_vert[1][0]
-        except: pass
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([(0, other_vert[2][1]), other_vert[2]])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] += other_vert[2][0]- point.x
-        except: pass
-      else:
-        if other.bounds[2] > self.bounds[0]: self._position[0] += other.bounds[2] - self.bounds[0]            
-    del self_vert, other_vert
+    if not bboxes_touch(self._bounds_arr, other._bounds_arr): return
+    dx, dy = self._polygon_resolve(other, direction, OVERLAP)
+    self._position[0] += dx
+    self._position[1] += dy
 
   ################## Handle Collisions ####################################
 
-  def _handle_circle_circle(self, other, direction):
-    line_distance = LineString([self.position, other.position])
-    c1 = self.contours
-    c2 = other.contours
-    # p1 is the point of c1 touching the point p2 of c2
-    p1 = line_distance.intersection(c1)
-    p2 = line_distance.intersection(c2)
-    if direction == "down": self._position[1] -= p1.y - p2.y
-    elif direction == "up": self._position[1] += p2.y - p1.y
-    elif direction == "right": self._position[0] += p2.x - p1.x
-    else: self._position[0] -= p1.x - p2.x
+  def _polygon_resolve(self, other, direction, mode):
+    # squares and triangles are resolved by a single compiled kernel
+    return polygon_resolve(self._shape_id, self.vertices, self._bounds_arr,
+                           other._shape_id, other.vertices, other._bounds_arr,
+                           direction, mode)
+
+  def _polygon_gap(self, other, direction):
+    """Free distance to the polygon sprite other along direction, or None."""
+    axis, sign = _AXIS_SIGN[direction]
+    gap = sign * self._polygon_resolve(other, direction, CONTACT)[axis]
+    return None if math.isnan(gap) else gap
 
+  def _close_gap(self, gap, direction):
+    """Move by gap along direction, gap being the free distance to a sprite."""
+    if gap is None: return
+    axis, sign = _AXIS_SIGN[direction]
+    self._position[axis] += sign * gap
+
+  def _handle_circle_circle(self, other, direction):
+    self._close_gap(self._circle_circle_gap(other, direction), direction)
 
   def _handle_circle_square(self, other, direction):
-    circle = self.contours
-    if direction == "down":
-      if other.vertices[1][0] > self.x:
-        line1 = LineString([other.vertices[1], (other.vertices[1][0], self.y)])
-        p = line1.intersection(circle)
-        try: self._position[1] -= p.y - other.vertices[1][1]
-        except: pass
-      elif other.vertices[0][0] < self.x:
-        line1 = LineString([other.vertices[0], (other.vertices[0][0], self.y)])
-        p = line1.intersection(circle)
-        try: self._position[1] -= p.y - other.vertices[0][1]
-        except: pass
-      else: self._position[1] -= self.y - self.prop - other.bounds[3]
-    elif direction == "up":
-      if other.vertices[2][0] > self.x:
-        line1 = LineString([(other.vertices[2][0], self.y), other.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] += other.vertices[2][1] - p.y
-        except: pass
-      elif other.vertices[3][0] < self.x:
-        line1 = LineString([(other.vertices[3][0], self.y), other.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] += other.vertices[3][1] - p.y
-        except: pass
-      else: self._position[1] += other.bounds[1] - (self.y + self.prop)
-    elif direction == "right":
-      if other.vertices[1][1] < self.y:
-        line1 = LineString([(self.x, other.vertices[1][1]), other.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] += other.vertices[1][0] - p.x
-        except: pass
-      elif other.vertices[2][1] > self.y:
-        line1 = LineString([(self.x, other.vertices[2][1]), other.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[0] += other.vertices[2][0] - p.x
-        except: pass
-      else: self._position[0] += other.bounds[0] - (self.x + self.prop)
-    else:
-      if other.vertices[0][1] < self.y:
-        line1 = LineString([other.vertices[0], (self.x, other.vertices[0][0])])
-        p = line1.intersection(circle)
-        try: self._position[0] -= p.x - other.vertices[0][0]
-        except: pass
-      elif other.vertices[3][1] > self.y:
-        line1 = LineString([other.vertices[3], (self.x, other.vertices[3][0])])
-        p = line1.intersection(circle)
-        try: self._position[0] -= p.x - other.vertices[3][0]
-        except: pass
-      else: self._position[0] -= self.x - self.prop - other.bounds[2]
+    self._close_gap(self._circle_square_gap(other, direction), direction)
 
   def _handle_square_circle(self, other, direction):
-    circle = other.contours
-    if direction == "down":
-      if self.vertices[2][0] > other.x:
-        line1 = LineString([(self.vertices[2][0], other.y), self.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= self.vertices[2][1] - p.y
-        except: pass
-      elif self.vertices[3][0] < other.x:
-        line1 = LineString([(self.vertices[3][0], other.y), self.vertices[3]])
-        p = line1.intersection(circle)
-        try: self._position[1] -= self.vertices[3][1] - p.y
-        except: pass
-      else: self._position[1] -= self.bounds[1] - (other.y + other.prop)
-    elif direction == "up":
-      if self.vertices[1][0] > other.x:
-        line1 = LineString([self.vertices[1], (self.vertices[1][0], other.y)])
-        p = line1.intersection(circle)
-        try: self._position[1] += p.y - self.vertices[1][1]
-        except: pass
-      elif self.vertices[0][0] < other.x:
-        line1 = LineString([self.vertices[0], (self.vertices[0][0], other.y)])
-        p = line1.intersection(circle)
-        try: self._position[1] += p.y - self.vertices[0][1]
-        except: pass
-      else: self._position[1] += other.y - other.prop - self.bounds[3]
-    elif direction == "right":
-      if self.vertices[3][1] > other.y:
-        line1 = LineString([self.vertices[3], (other.x, self.vertices[3][1])])
-        p = line1.intersection(circle)
-        try: self._position[0] += p.x - self.vertices[3][0]
-        except: pass
-      elif self.vertices[0][1] < other.y:
-        line1 = LineString([self.vertices[0], (other.x, self.vertices[0][1])])
-        p = line1.intersection(circle)
-        try: self._position[0] += p.x - self.vertices[0][0]
-        except: pass
-      else: self._position[0] += other.x - other.prop - self.bounds[2]
-    else:
-      if self.vertices[2][1] > other.y:
-        line1 = LineString([(other.x, self.vertices[2][1]), self.vertices[2]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= self.vertices[2][0] - p.x
-        except: pass
-      elif self.vertices[1][1] < other.y:
-        line1 = LineString([(other.x, self.vertices[1][1]), self.vertices[1]])
-        p = line1.intersection(circle)
-        try: self._position[0] -= self.vertices[1][0] - p.x
-        except: pass
-      else: self._position[0] -= self.bounds[0] - (other.x + other.prop)
+    self._close_gap(self._square_circle_gap(other, direction), direction)
 
   def _handle_square_square(self, other, direction):
-    if direction == "down":
-      self._position[1] -= self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      self._position[1] += other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      self._position[0] += other.bounds[0] - self.bounds[2]
-    else:
-      self._position[0] -= self.bounds[0] - other.bounds[2]
+    self._close_gap(self._polygon_gap(other, direction), direction)
 
   def _handle_square_triangle(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[3][0] < other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([(self_vert[3][0], 0), self_vert[3]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= self_vert[3][1] - point.y 
-        except: pass
-      elif self_vert[2][0] > other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([(self_vert[2][0], 0), self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= self_vert[2][1] - point.y 
-        except: pass
-      else:
-        self._position[1] -= self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      self._position[1] += other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]: 
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([self_vert[3], (1, self_vert[3][1])])
-        point = line1.intersection(line2)
-        try: self._position[0] += point.x - self_vert[3][0] 
-        except: pass
-      else:
-        self._position[0] += other.bounds[0] - self.bounds[2]
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([(0, self_vert[2][1]), self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= self_vert[2][0] - point.x
-        except: pass
-      else:
-        self._position[0] -= self.bounds[0] - other.bounds[2]
-    del self_vert, other_vert
+    self._close_gap(self._polygon_gap(other, direction), direction)
 
   def _handle_triangle_square(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      self._position[1] -= self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      if other_vert[3][0] < self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([(other_vert[3][0], 0), other_vert[3]])
-        point = line1.intersection(line2)
-        try: self._position[1] += other_vert[3][1] - point.y 
-        except: pass
-      elif other_vert[2][0] > self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([(other_vert[2][0], 0), other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] += other_vert[2][1] - point.y 
-        except: pass
-      else:
-        self._position[1] += other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]:
-        self._position[0] += other.bounds[0] - self.bounds[2]
-      else:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([(0, other_vert[2][1]), other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] += other_vert[2][0] - point.x 
-        except: pass
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        self._position[0] -= self.bounds[0] - other.bounds[2]
-      else:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([other_vert[3], (1, other_vert[3][1])])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - other_vert[3][0] 
-        except: pass
-    del self_vert, other_vert
+    self._close_gap(self._polygon_gap(other, direction), direction)
 
   def _handle_circle_triangle(self, other, direction):
     r = self.prop
-    if direction == "down":
-      if self.y - r >= other.vertices[0][1] and self.x - other.vertices[0][0] <= 0.02:
+    other_vert = other.vertices
+    if direction == DOWN:
+      if self.y - r >= other_vert[0][1] and self.x - other_vert[0][0] <= 0.02:
         self._position[1] -= self.y - r - other.bounds[3]
       else:  
-        if self.x <= other.vertices[0][0]:
-          p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[1]])
-        if self.x > other.vertices[0][0]:
-          p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[2]])
-        line1 = LineString([(p[0],0), p])
-        line3 = LineString([other.vertices[0], (other.vertices[0][0], self.y)])
+        if self.x <= other_vert[0][0]:
+          p = (self.x + r * C7PI4, self.y + r * S7PI4)
+          q = other_vert[1]
+        if self.x > other_vert[0][0]:
+          p = (self.x + r * C5PI4, self.y + r * S5PI4)
+          q = other_vert[2]
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          d1 = p[1] - line1.intersection(line2).y
-        if line3.intersects(self.contours):
-          d2 = line3.intersection(self.contours).bounds[1] - other.vertices[0][1]
+        point = seg_intersect(p[0], 0., p[0], p[1], other_vert[0][0], other_vert[0][1], q[0], q[1])
+        if point is not None:
+          d1 = p[1] - point[1]
+        ext = seg_circle_extreme(other_vert[0][0], other_vert[0][1], other_vert[0][0], self.y, self.x, self.y, self.prop, 1, False)
+        if not math.isnan(ext):
+          d2 = ext - other_vert[0][1]
         self._position[1] -= max(d1, d2) #if min(d1, d2) != 1 else 0
          
-    elif direction == "up":
-      if other.vertices[2][0] < self.x:
-        line1 = LineString([other.vertices[2], (other.vertices[2][0], self.y)])
-        point = line1.intersection(self.contours)
-        try: self._position[1] += other.vertices[2][1] - point.bounds[3]
-        except: pass
-      elif other.vertices[1][0] > self.x:
-        line1 = LineString([other.vertices[1], (other.vertices[1][0], self.y)])
-        point = line1.intersection(self.contours)
-        try: self._position[1] += other.vertices[1][1] - point.bounds[3]
-        except: pass
+    elif direction == UP:
+      if other_vert[2][0] < self.x:
+        ext = seg_circle_extreme(other_vert[2][0], other_vert[2][1], other_vert[2][0], self.y, self.x, self.y, self.prop, 1, True)
+        if not math.isnan(ext): self._position[1] += other_vert[2][1] - ext
+      elif other_vert[1][0] > self.x:
+        ext = seg_circle_extreme(other_vert[1][0], other_vert[1][1], other_vert[1][0], self.y, self.x, self.y, self.prop, 1, True)
+        if not math.isnan(ext): self._position[1] += other_vert[1][1] - ext
       else: self._position[1] += other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.y - r <= other.vertices[0][1] and self.y - r >= other.vertices[1][1]:
-        p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([p, (1, self.y)])
-        line2 = LineString([other.vertices[0], other.vertices[1]])
-        line3 = LineString([(self.x, other.vertices[0][1]), other.vertices[0]])
+    elif direction == RIGHT:
+      if self.y - r <= other_vert[0][1] and self.y - r >= other_vert[1][1]:
+        p = (self.x + r * C7PI4, self.y + r * S7PI4)
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          point = line1.intersection(line2)
-          d1 = point.x - p[0]
-        if line3.intersects(self.contours):
-          d2 = other.vertices[0][0] - line3.intersection(self.contours).bounds[2]  
+        point = seg_intersect(p[0], p[1], 1., self.y, other_vert[0][0], other_vert[0][1], other_vert[1][0], other_vert[1][1])
+        if point is not None:
+          d1 = point[0] - p[0]
+        ext = seg_circle_extreme(self.x, other_vert[0][1], other_vert[0][0], other_vert[0][1], self.x, self.y, self.prop, 0, True)
+        if not math.isnan(ext):
+          d2 = other_vert[0][0] - ext  
         self._position[0] += max(d1, d2)
       else:
-        line1 = LineString([(self.x, other.vertices[1][1]), other.vertices[1]])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: self._position[0] += other.vertices[1][0] - p.x
-        except: pass
+        pts = seg_circle(self.x, other_vert[1][1], other_vert[1][0], other_vert[1][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] += other_vert[1][0] - pts[0][0]
     else:
-      if self.y - r <= other.vertices[0][1] and self.y - r >= other.vertices[1][1]:
-        p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([(0, self.y), p])
-        line2 = LineString([other.vertices[0], other.vertices[2]])
-        line3 = LineString([(self.x, other.vertices[0][1]), other.vertices[0]])
-        point = line1.intersection(line2)
+      if self.y - r <= other_vert[0][1] and self.y - r >= other_vert[1][1]:
+        p = (self.x + r * C5PI4, self.y + r * S5PI4)
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          point = line1.intersection(line2)
-          d1 = p[0] - point.x
-        if line3.intersects(self.contours):
-          d2 = line3.intersection(self.contours).bounds[0] - other.vertices[0][0]  
+        point = seg_intersect(0., self.y, p[0], p[1], other_vert[0][0], other_vert[0][1], other_vert[2][0], other_vert[2][1])
+        if point is not None:
+          d1 = p[0] - point[0]
+        ext = seg_circle_extreme(self.x, other_vert[0][1], other_vert[0][0], other_vert[0][1], self.x, self.y, self.prop, 0, False)
+        if not math.isnan(ext):
+          d2 = ext - other_vert[0][0]  
         self._position[0] -= max(d1, d2)
       else:
-        line1 = LineString([other.vertices[2], (self.x, other.vertices[2][1])])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: self._position[0] -= p.x - other.vertices[2][0] 
-        except: pass
+        pts = seg_circle(other_vert[2][0], other_vert[2][1], self.x, other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) == 1: self._position[0] -= pts[0][0] - other_vert[2][0]
 
   def _handle_triangle_circle(self, other, direction):
     r = other.prop
-    if direction == "down": 
-      if self.vertices[2][0] < other.x:
-        line1 = LineString([self.vertices[2], (self.vertices[2][0], other.y)])
-        point = line1.intersection(other.contours)
-        try: self._position[1] -= self.vertices[2][1] - point.bounds[3]
-        except: pass
-      elif self.vertices[1][0] > other.x:
-        line1 = LineString([self.vertices[1], (self.vertices[1][0], other.y)])
-        point = line1.intersection(other.contours)
-        try: self._position[1] -= self.vertices[1][1] - point.bounds[3]
-        except: pass
+    self_vert = self.vertices
+    if direction == DOWN: 
+      if self_vert[2][0] < other.x:
+        ext = seg_circle_extreme(self_vert[2][0], self_vert[2][1], self_vert[2][0], other.y, other.x, other.y, other.prop, 1, True)
+        if not math.isnan(ext): self._position[1] -= self_vert[2][1] - ext
+      elif self_vert[1][0] > other.x:
+        ext = seg_circle_extreme(self_vert[1][0], self_vert[1][1], self_vert[1][0], other.y, other.x, other.y, other.prop, 1, True)
+        if not math.isnan(ext): self._position[1] -= self_vert[1][1] - ext
       else: self._position[1] -= self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      if not (other.x + 0.02 <= self.vertices[0][0] or other.x - 0.02 >= self.vertices[0][0]):
+    elif direction == UP:
+      if not (other.x + 0.02 <= self_vert[0][0] or other.x - 0.02 >= self_vert[0][0]):
         self._position[1] += other.y - r - self.bounds[3]
       else:
-        if other.x <= self.vertices[0][0]:
-          p = other.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-          line2 = LineString([self.vertices[0], self.vertices[1]])
-        if other.x > self.vertices[0][0]:
-          p = other.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-          line2 = LineString([self.vertices[0], self.vertices[2]])
-        line1 = LineString([(p[0],0), p])
-        line3 = LineString([self.vertices[0], (self.vertices[0][0], other.y)])
+        if other.x <= self_vert[0][0]:
+          p = (other.x + r * C7PI4, other.y + r * S7PI4)
+          q = self_vert[1]
+        if other.x > self_vert[0][0]:
+          p = (other.x + r * C5PI4, other.y + r * S5PI4)
+          q = self_vert[2]
         d1, d2 = (0, 0)
-        if line1.intersection(line2):
-          point = line1.intersection(line2)
-          d1 = p[1] - point.y  
-        if line3.intersects(other.contours):
-          d2 = line3.intersection(other.contours).bounds[1] - self.vertices[0][1]
+        point = seg_intersect(p[0], 0., p[0], p[1], self_vert[0][0], self_vert[0][1], q[0], q[1])
+        if point is not None:
+          d1 = p[1] - point[1]
+        ext = seg_circle_extreme(self_vert[0][0], self_vert[0][1], self_vert[0][0], other.y, other.x, other.y, other.prop, 1, False)
+        if not math.isnan(ext):
+          d2 = ext - self_vert[0][1]
         self._position[1] += max(d1, d2) # if min(d1, d2) != 1 else 0
-    elif direction == "right":
-      if self.vertices[2][1] >= other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[2], other.position]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: self._position[0] += p1[0][0] - self.vertices[2][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[2], other.position]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: self._position[0] += p1[0][0] - self.vertices[0][0]
-      else:
-        p = other.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([(0, p[1]), p])
-        line2 = LineString([self.vertices[0], self.vertices[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] += p[0] - point.x
-        except: pass
+    elif direction == RIGHT:
+      if self_vert[2][1] >= other.y + r * S5PI4:
+        p1 = _other_endpoint(self_vert[2][0], self_vert[2][1], other.x, other.y, other.x, other.y, other.prop, other.position)
+        if p1 is not None: self._position[0] += p1[0] - self_vert[2][0]
+      elif self_vert[0][1] < other.y + r * S5PI4:
+        p1 = _other_endpoint(self_vert[2][0], self_vert[2][1], other.x, other.y, other.x, other.y, other.prop, other.position)
+        if p1 is not None: self._position[0] += p1[0] - self_vert[0][0]
+      else:
+        p = (other.x + r * C5PI4, other.y + r * S5PI4)
+        point = seg_intersect(0., p[1], p[0], p[1], self_vert[0][0], self_vert[0][1], self_vert[2][0], self_vert[2][1])
+        if point is not None: self._position[0] += p[0] - point[0]
     else:
-      if self.vertices[1][1] >= other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([other.position, self.vertices[1]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: self._position[0] -= self.vertices[1][0] - p1[0][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([other.position, self.vertices[0]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: self._position[0] -= self.vertices[0][0] - p1[0][0]
+      if self_vert[1][1] >= other.y + r * S7PI4:
+        p1 = _other_endpoint(other.x, other.y, self_vert[1][0], self_vert[1][1], other.x, other.y, other.prop, other.position)
+        if p1 is not None: self._position[0] -= self_vert[1][0] - p1[0]
+      elif self_vert[0][1] < other.y + r * S7PI4:
+        p1 = _other_endpoint(other.x, other.y, self_vert[0][0], self_vert[0][1], other.x, other.y, other.prop, other.position)
+        if p1 is not None: self._position[0] -= self_vert[0][0] - p1[0]
       else:
-        p = other.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([p, (1, p[1])])
-        line2 = LineString([self.vertices[0], self.vertices[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - p[0]
-        except: pass
+        p = (other.x + r * C7PI4, other.y + r * S7PI4)
+        point = seg_intersect(p[0], p[1], 1., p[1], self_vert[0][0], self_vert[0][1], self_vert[1][0], self_vert[1][1])
+        if point is not None: self._position[0] -= point[0] - p[0]
 
   def _handle_triangle_triangle(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[2][0] < other_vert[0][0]:
-        line1 = LineString([(self_vert[2][0], 0), self_vert[2]])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= self_vert[2][1] - point.y
-        except: pass
-      elif self_vert[1][0] > other_vert[0][0]:
-        line1 = LineString([(self_vert[1][0], 0), self_vert[1]])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] -= self_vert[1][1] - point.y
-        except: pass
-      else:
-        self._position[1] -= self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      if other_vert[2][0] < self_vert[0][0]:
-        line1 = LineString([(other_vert[2][0], 0), other_vert[2]])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[1] += other_vert[2][1] - point.y
-        except: pass
-      elif other_vert[1][0] > self_vert[0][0]:
-        line1 = LineString([(other_vert[1][0], 0), other_vert[1]])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[1] += other_vert[1][1] - point.y
-        except: pass
-      else:
-        self._position[1] += other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([self_vert[2], (1, self_vert[2][1])])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] += point.x - self_vert[2][0]
-        except: pass
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([(0, other_vert[1][1]), other_vert[1]])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] += other_vert[1][0] - point.x
-        except: pass
-      else:
-        self._position[0] += other.bounds[0] - self.bounds[2]
-    else:
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([(0, self_vert[1][1]), self_vert[1]])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= self_vert[1][0] - point.x
-        except: pass
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([other_vert[2], (1, other_vert[2][1])])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: self._position[0] -= point.x - other_vert[2][0]
-        except: pass
-      else:
-        self._position[0] -= other.bounds[2] - self.bounds[0]
-    del self_vert, other_vert
+    self._close_gap(self._polygon_gap(other, direction), direction)
 
   ##### DISTANCES ##################################
-  def circle_circle_distance(self, other, direction):
-    line_distance = LineString([self.position, other.position])
-    c1 = self.contours
-    c2 = other.contours
+  def _circle_circle_gap(self, other, direction):
+    r1, r2 = self._radius(), other._radius()
+    sx, sy = self._position
+    ox, oy = other._position
+    dist = math.hypot(ox - sx, oy - sy)
+    ux, uy = (ox - sx) / dist, (oy - sy) / dist
     # p1 is the point of c1 touching the point p2 of c2
-    p1 = line_distance.intersection(c1)
-    p2 = line_distance.intersection(c2)
-    if direction == "down": return p1.y - p2.y
-    elif direction == "up": return p2.y - p1.y
-    elif direction == "right": return p2.x - p1.x
-    else: return p1.x - p2.x
+    p1x, p1y = sx + r1 * ux, sy + r1 * uy
+    p2x, p2y = ox - r2 * ux, oy - r2 * uy
+    if direction == DOWN: return p1y - p2y
+    elif direction == UP: return p2y - p1y
+    elif direction == RIGHT: return p2x - p1x
+    else: return p1x - p2x
+
+  def circle_circle_distance(self, other, direction):
+    return self._circle_circle_gap(other, DIR[direction])
 
+  def _circle_square_gap(self, other, direction):
+    gap = circle_square_gap(self.x, self.y, self.prop, other.vertices, other._bounds_arr, direction)
+    return None if math.isnan(gap) else gap
 
   def circle_square_distance(self, other, direction):
-    circle = self.contours
-    if direction == "down":
-      if other.vertices[1][0] > self.x:
-        line1 = LineString([other.vertices[1], (other.vertices[1][0], self.y)])
-        p = line1.intersection(circle)
-        try: return p.y - other.vertices[1][1]
-        except: return 1
-      elif other.vertices[0][0] < self.x:
-        line1 = LineString([other.vertices[0], (other.vertices[0][0], self.y)])
-        p = line1.intersection(circle)
-        try: return p.y - other.vertices[0][1]
-        except: return 1
-      else: return self.y - self.prop - other.bounds[3]
-    elif direction == "up":
-      if other.vertices[2][0] > self.x:
-        line1 = LineString([(other.vertices[2][0], self.y), other.vertices[2]])
-        p = line1.intersection(circle)
-        try: return other.vertices[2][1] - p.y
-        except: return 1
-      elif other.vertices[3][0] < self.x:
-        line1 = LineString([(other.vertices[3][0], self.y), other.vertices[3]])
-        p = line1.intersection(circle)
-        try: return other.vertices[3][1] - p.y
-        except: return 1
-      else: return other.bounds[1] - (self.y + self.prop)
-    elif direction == "right":
-      if other.vertices[1][1] < self.y:
-        line1 = LineString([(self.x, other.vertices[1][1]), other.vertices[1]])
-        p = line1.intersection(circle)
-        try: return other.vertices[1][0] - p.x
-        except: return 1
-      elif other.vertices[2][1] > self.y:
-        line1 = LineString([(self.x, other.vertices[2][1]), other.vertices[2]])
-        p = line1.intersection(circle)
-        try: return other.vertices[2][0] - p.x
-        except: return 1
-      else: return other.bounds[0] - (self.x + self.prop)
-    else:
-      if other.vertices[0][1] < self.y:
-        line1 = LineString([other.vertices[0], (self.x, other.vertices[0][0])])
-        p = line1.intersection(circle)
-        try: return p.x - other.vertices[0][0]
-        except: return 1
-      elif other.vertices[3][1] > self.y:
-        line1 = LineString([other.vertices[3], (self.x, other.vertices[3][0])])
-        p = line1.intersection(circle)
-        try: return p.x - other.vertices[3][0]
-        except: return 1
-      else: return self.x - self.prop - other.bounds[2]
+    gap = self._circle_square_gap(other, DIR[direction])
+    return 1 if gap is None else gap
+
+  def _square_circle_gap(self, other, direction):
+    gap = square_circle_gap(self.vertices, self._bounds_arr, other.x, other.y, other.prop, direction)
+    return None if math.isnan(gap) else gap
 
   def square_circle_distance(self, other, direction):
-    circle = other.contours
-    if direction == "down":
-      if self.vertices[2][0] > other.x:
-        line1 = LineString([(self.vertices[2][0], other.y), self.vertices[2]])
-        p = line1.intersection(circle)
-        try: return self.vertices[2][1] - p.y
-        except: return 1
-      elif self.vertices[3][0] < other.x:
-        line1 = LineString([(self.vertices[3][0], other.y), self.vertices[3]])
-        p = line1.intersection(circle)
-        try: return self.vertices[3][1] - p.y
-        except: return 1
-      else: return self.bounds[1] - (other.y + other.prop)
-    elif direction == "up":
-      if self.vertices[1][0] > other.x:
-        line1 = LineString([self.vertices[1], (self.vertices[1][0], other.y)])
-        p = line1.intersection(circle)
-        try: return p.y - self.vertices[1][1]
-        except: return 1
-      elif self.vertices[0][0] < other.x:
-        line1 = LineString([self.vertices[0], (self.vertices[0][0], other.y)])
-        p = line1.intersection(circle)
-        try: return p.y - self.vertices[0][1]
-        except: return 1
-      else: return other.y - other.prop - self.bounds[3]
-    elif direction == "right":
-      if self.vertices[3][1] > other.y:
-        line1 = LineString([self.vertices[3], (other.x, self.vertices[3][1])])
-        p = line1.intersection(circle)
-        try: return p.x - self.vertices[3][0]
-        except: return 1
-      elif self.vertices[0][1] < other.y:
-        line1 = LineString([self.vertices[0], (other.x, self.vertices[0][1])])
-        p = line1.intersection(circle)
-        try: return p.x - self.vertices[0][0]
-        except: return 1
-      else: return other.x - other.prop - self.bounds[2]
-    else:
-      if self.vertices[2][1] > other.y:
-        line1 = LineString([(other.x, self.vertices[2][1]), self.vertices[2]])
-        p = line1.intersection(circle)
-        try: return self.vertices[2][0] - p.x
-        except: return 1
-      elif self.vertices[1][1] < other.y:
-        line1 = LineString([(other.x, self.vertices[1][1]), self.vertices[1]])
-        p = line1.intersection(circle)
-        try: return self.vertices[1][0] - p.x
-        except: return 1
-      else: return self.bounds[0] - (other.x + other.prop)
+    gap = self._square_circle_gap(other, DIR[direction])
+    return 1 if gap is None else gap
 
   def square_square_distance(self, other, direction):
     if direction == "down":
@@ -1036,244 +617,115 @@ class AbstractSprite(object):
   
   def circle_triangle_distance(self, other, direction):
     r = self.prop
+    other_vert = other.vertices
     if direction == "down":
-      if not (self.x - r >= other.vertices[0][0] or self.x + r <= other.vertices[0][0]):
+      if not (self.x - r >= other_vert[0][0] or self.x + r <= other_vert[0][0]):
         return other.bounds[3] - (self.y - r)  + 1e-5
       else:
-        if self.x <= other.vertices[0][0]:
-          p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[1]])
-        elif self.x > other.vertices[0][0]:
-          p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-          line2 = LineString([other.vertices[0], other.vertices[2]])
-        line1 = LineString([p, (p[0],1)])
-        point = line1.intersection(line2)
-        try: return point.y - p[1]
-        except: return 1         
+        if self.x <= other_vert[0][0]:
+          p = (self.x + r * C7PI4, self.y + r * S7PI4)
+          q = other_vert[1]
+        elif self.x > other_vert[0][0]:
+          p = (self.x + r * C5PI4, self.y + r * S5PI4)
+          q = other_vert[2]
+        point = seg_intersect(p[0], p[1], p[0], 1., other_vert[0][0], other_vert[0][1], q[0], q[1])
+        if point is None: return 1
+        return point[1] - p[1]
     elif direction == "up":
       return (self.y + r) - other.bounds[1] + 1e-5
     elif direction == "right":
-      if self.y - r <= other.vertices[0][1] and self.y - r >= other.vertices[1][1]:
-        p = self.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([(0, self.y), p]) 
-        line2 = LineString([other.vertices[0], other.vertices[1]])
-        point = line1.intersection(line2)
-        try: return p[0] - point.x 
-        except: return 1
-      else:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: return p.x - other.vertices[1][0]  + 1e-5
-        except: return 1
+      if self.y - r <= other_vert[0][1] and self.y - r >= other_vert[1][1]:
+        p = (self.x + r * C7PI4, self.y + r * S7PI4)
+        point = seg_intersect(0., self.y, p[0], p[1], other_vert[0][0], other_vert[0][1], other_vert[1][0], other_vert[1][1])
+        if point is None: return 1
+        return p[0] - point[0]
+      else:
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) != 1: return 1
+        return pts[0][0] - other_vert[1][0]  + 1e-5
     else:
-      if self.y - r <= other.vertices[0][1] and self.y -r >= other.vertices[2][1]:
-        p = self.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([p, (1, self.y)])
-        line2 = LineString([other.vertices[0], other.vertices[2]])
-        point = line1.intersection(line2)
-        try: return point.x - p[0]
-        except: return 1
+      if self.y - r <= other_vert[0][1] and self.y -r >= other_vert[2][1]:
+        p = (self.x + r * C5PI4, self.y + r * S5PI4)
+        point = seg_intersect(p[0], p[1], 1., self.y, other_vert[0][0], other_vert[0][1], other_vert[2][0], other_vert[2][1])
+        if point is None: return 1
+        return point[0] - p[0]
       else:
-        line1 = LineString([other.vertices[1], other.vertices[2]])
-        line2 = LineString(self.vertices)
-        p = line1.intersection(line2)
-        try: return other.vertices[2][0] - p.x  + 1e-5
-        except: return 1
+        pts = seg_circle(other_vert[1][0], other_vert[1][1], other_vert[2][0], other_vert[2][1], self.x, self.y, self.prop)
+        if len(pts) != 1: return 1
+        return other_vert[2][0] - pts[0][0]  + 1e-5
 
   def square_triangle_distance(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[3][0] < other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([(self_vert[3][0], 0), self_vert[3]])
-        point = line1.intersection(line2)
-        try: return self_vert[3][1] - point.y 
-        except: return 1
-      elif self_vert[2][0] > other_vert[0][0]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([(self_vert[2][0], 0), self_vert[2]])
-        point = line1.intersection(line2)
-        try: return self_vert[2][1] - point.y 
-        except: return 1
-      else:
-        return self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      return other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]: 
-        line1 = LineString([other_vert[0], other_vert[1]])
-        line2 = LineString([self_vert[3], (1, self_vert[3][1])])
-        point = line1.intersection(line2)
-        try: return point.x - self_vert[3][0] 
-        except: return 1
-      else:
-        return other.bounds[0] - self.bounds[2]
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        line1 = LineString([other_vert[0], other_vert[2]])
-        line2 = LineString([(0, self_vert[2][1]), self_vert[2]])
-        point = line1.intersection(line2)
-        try: return self_vert[2][0] - point.x
-        except: return 1
-      else:
-        return self.bounds[0] - other.bounds[2]
+    gap = self._polygon_gap(other, DIR[direction])
+    return 1 if gap is None else gap
 
   def triangle_circle_distance(self, other, direction):
     r = other.prop
+    self_vert = self.vertices
     if direction == "down": return self.bounds[1] - (other.y + r)
     elif direction == "up":
-      if not (other.x + r <= self.vertices[0][0] or other.x - r >= self.vertices[0][0]):   
+      if not (other.x + r <= self_vert[0][0] or other.x - r >= self_vert[0][0]):   
         return other.y - r - self.bounds[3]
       else:
-        line1 = LineString([self.vertices[0], other.position])
-        p1 = line1.intersection(other.polygon)
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: return p1[0][1] - self.vertices[0][1]
+        p1 = _other_endpoint(self_vert[0][0], self_vert[0][1], other.x, other.y, other.x, other.y, other.prop, other.position)
+        if p1 is not None: return p1[1] - self_vert[0][1]
     elif direction == "right":
-      if self.vertices[2][1] >= other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[2], other.position]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: return p1[0][0] - self.vertices[2][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((5*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([self.vertices[2], other.position]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: return p1[0][0] - self.vertices[0][0]
-      else:
-        p = other.position + (r * np.cos((5*np.pi)/4), r * np.sin((5*np.pi)/4))
-        line1 = LineString([(0, p[1]), p])
-        line2 = LineString([self.vertices[0], self.vertices[2]])
-        point = line1.intersection(line2)
-        try: return p[0] - point.x
-        except: return 1
+      if self_vert[2][1] >= other.y + r * S5PI4:
+        p1 = _other_endpoint(self_vert[2][0], self_vert[2][1], other.x, other.y, other.x, other.y, other.prop, other.position)
+        if p1 is not None: return p1[0] - self_vert[2][0]
+      elif self_vert[0][1] < other.y + r * S5PI4:
+        p1 = _other_endpoint(self_vert[2][0], self_vert[2][1], other.x, other.y, other.x, other.y, other.prop, other.position)
+        if p1 is not None: return p1[0] - self_vert[0][0]
+      else:
+        p = (other.x + r * C5PI4, other.y + r * S5PI4)
+        point = seg_intersect(0., p[1], p[0], p[1], self_vert[0][0], self_vert[0][1], self_vert[2][0], self_vert[2][1])
+        if point is None: return 1
+        return p[0] - point[0]
     else:
-      if self.vertices[1][1] >= other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([other.position, self.vertices[1]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: return self.vertices[1][0] - p1[0][0]
-      elif self.vertices[0][1] < other.y + r * np.sin((7*np.pi)/4):
-        p1 = other.polygon.intersection(LineString([other.position, self.vertices[0]]))
-        p1 = [p for p in list(p1.coords) if Point(p) != Point(other.position)]
-        if p1: return self.vertices[0][0] - p1[0][0]
-      else:
-        p = other.position + (r * np.cos((7*np.pi)/4), r * np.sin((7*np.pi)/4))
-        line1 = LineString([p, (1, p[1])])
-        line2 = LineString([self.vertices[0], self.vertices[1]])
-        point = line1.intersection(line2)
-        try: return point.x - p[0]
-        except: return 1
+      if self_vert[1][1] >= other.y + r * S7PI4:
+        p1 = _other_endpoint(other.x, other.y, self_vert[1][0], self_vert[1][1], other.x, other.y, other.prop, other.position)
+        if p1 is not None: return self_vert[1][0] - p1[0]
+      elif self_vert[0][1] < other.y + r * S7PI4:
+        p1 = _other_endpoint(other.x, other.y, self_vert[0][0], self_vert[0][1], other.x, other.y, other.prop, other.position)
+        if p1 is not None: return self_vert[0][0] - p1[0]
+      else:
+        p = (other.x + r * C7PI4, other.y + r * S7PI4)
+        point = seg_intersect(p[0], p[1], 1., p[1], self_vert[0][0], self_vert[0][1], self_vert[1][0], self_vert[1][1])
+        if point is None: return 1
+        return point[0] - p[0]
 
   def triangle_square_distance(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      return self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      if other_vert[3][0] < self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([(other_vert[3][0], 0), other_vert[3]])
-        point = line1.intersection(line2)
-        try: return other_vert[3][1] - point.y 
-        except: return 1
-      elif other_vert[2][0] > self_vert[0][0]:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([(other_vert[2][0], 0), other_vert[2]])
-        point = line1.intersection(line2)
-        try: return other_vert[2][1] - point.y 
-        except: return 1
-      else:
-        return other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] >= other.bounds[1]:
-        return other.bounds[0] - self.bounds[2]
-      else:
-        line1 = LineString([self_vert[0], self_vert[2]])
-        line2 = LineString([(0, other_vert[2][1]), other_vert[2]])
-        point = line1.intersection(line2)
-        try: return other_vert[2][0] - point.x 
-        except: return 1
-    else:
-      if self.bounds[1] >= other.bounds[1]:
-        return self.bounds[0] - other.bounds[2]
-      else:
-        line1 = LineString([self_vert[0], self_vert[1]])
-        line2 = LineString([other_vert[3], (1, other_vert[3][1])])
-        point = line1.intersection(line2)
-        try: return point.x - other_vert[3][0] 
-        except: return 1
+    gap = self._polygon_gap(other, DIR[direction])
+    return 1 if gap is None else gap
 
   def triangle_triangle_distance(self, other, direction):
-    self_vert = self.vertices
-    other_vert = other.vertices
-    if direction == "down":
-      if self_vert[2][0] < other_vert[0][0]:
-        line1 = LineString([(self_vert[2][0], 0), self_vert[2]])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: return self_vert[2][1] - point.y
-        except: return 1
-      elif self_vert[1][0] > other_vert[0][0]:
-        line1 = LineString([(self_vert[1][0], 0), self_vert[1]])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: return self_vert[1][1] - point.y
-        except: return 1
-      else:
-        return self.bounds[1] - other.bounds[3]
-    elif direction == "up":
-      if other_vert[2][0] < self_vert[0][0]:
-        line1 = LineString([(other_vert[2][0], 0), other_vert[2]])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: return other_vert[2][1] - point.y
-        except: return 1
-      elif other_vert[1][0] > self_vert[0][0]:
-        line1 = LineString([(other_vert[1][0], 0), other_vert[1]])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: return other_vert[1][1] - point.y
-        except: return 1
-      else:
-        return other.bounds[1] - self.bounds[3]
-    elif direction == "right":
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([self_vert[2], (1, self_vert[2][1])])
-        line2 = LineString([other_vert[0], other_vert[1]])
-        point = line1.intersection(line2)
-        try: return point.x - self_vert[2][0]
-        except: return 1
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([(0, other_vert[1][1]), other_vert[1]])
-        line2 = LineString([self_vert[0], self_vert[2]])
-        point = line1.intersection(line2)
-        try: return other_vert[1][0] - point.x
-        except: return 1
-      else:
-        return other.bounds[0] - self.bounds[2]
-    else:
-      if self.bounds[1] > other.bounds[1]:
-        line1 = LineString([(0, self_vert[1][1]), self_vert[1]])
-        line2 = LineString([other_vert[0], other_vert[2]])
-        point = line1.intersection(line2)
-        try: return self_vert[1][0] - point.x
-        except: return 1
-      elif self.bounds[1] < other.bounds[1]:
-        line1 = LineString([other_vert[2], (1, other_vert[2][1])])
-        line2 = LineString([self_vert[0], self_vert[1]])
-        point = line1.intersection(line2)
-        try: return point.x - other_vert[2][0]
-        except: return 1
-      else:
-        return other.bounds[2] - self.bounds[0]
+    gap = self._polygon_gap(other, DIR[direction])
+    return 1 if gap is None else gap
+
   
 
   @property
   def vertices(self):
     """Numpy array of vertices of the shape."""
-    transform = mpl_transforms.Affine2D().translate(*self._position)
-    path = transform.transform_path(self._centered_path)
-    return path.vertices
+    cache = self._geom_cache()
+    if 'vertices' not in cache:
+      vertices = self._vertices_at(self._position)
+      vertices.flags.writeable = False
+      cache['vertices'] = vertices
+    return cache['vertices']
+
+  def _vertices_at(self, position):
+    """Vertices the shape would have if it were centered at position."""
+    return self._centered_vertices + position
+
+  def _bounds_at(self, position):
+    """(min_x, min_y, max_x, max_y) of the shape centered at position."""
+    v = self._vertices_at(position)
+    return tuple(np.concatenate((v.min(axis=0), v.max(axis=0))).tolist())
+
+  def _moved_position(self, motion):
+    # position after motion, rounded to the dtype of _position like an
+    # in-place move would
+    return (self._position + motion).astype(self._position.dtype)
 
   @property
   def out_of_frame(self):
@@ -1294,6 +746,7 @@ class AbstractSprite(object):
   @shape.setter
   def shape(self, s):
     self._shape = s
+    self._shape_id = SHAPE_IDS.get(s, -1)
     self._reset_centered_path()
 
   @property
@@ -1302,9 +755,8 @@ class AbstractSprite(object):
 
   @angle.setter
   def angle(self, a):
-    rotate = mpl_transforms.Affine2D().rotate_deg(a - self._angle)
-    self._centered_path = rotate.transform_path(self._centered_path)
     self._angle = a
+    self._reset_centered_path()
 
   @property
   def scale(self):
@@ -1312,9 +764,8 @@ class AbstractSprite(object):
 
   @scale.setter
   def scale(self, s):
-    rescale = mpl_transforms.Affine2D().scale(s - self._scale)
-    self._centered_path = rescale.transform_path(self._centered_path)
     self._scale = s
+    self._reset_centered_path()
 
   @property
   def c0(self):
@@ -1357,20 +808,48 @@ class AbstractSprite(object):
 
   @property
   def polygon(self):
-    return Polygon(self.vertices)
+    cache = self._geom_cache()
+    if 'polygon' not in cache:
+      cache['polygon'] = Polygon(self.vertices)
+    return cache['polygon']
 
   @property
   def bounds(self):
-    return self.polygon.bounds
+    # same (min_x, min_y, max_x, max_y) floats as polygon.bounds, read
+    # straight off the vertices
+    cache = self._geom_cache()
+    if 'bounds' not in cache:
+      v = self.vertices
+      cache['bounds'] = tuple(np.concatenate((v.min(axis=0), v.max(axis=0))).tolist())
+    return cache['bounds']
+
+  @property
+  def _bounds_arr(self):
+    cache = self._geom_cache()
+    if 'bounds_arr' not in cache:
+      if self._shape == "circle" and self.prop is not None:
+        x, y, r = self._position[0], self._position[1], self.prop
+        cache['bounds_arr'] = np.array([x - r, y - r, x + r, y + r])
+      else:
+        cache['bounds_arr'] = np.array(self.bounds)
+    return cache['bounds_arr']
 
   @property  
   def offsets(self): 
-    bottom_left = np.abs((self.bounds[0], self.bounds[1]) - self._position) # (min_x, min_y)
-    top_right = np.abs((self.bounds[2], self.bounds[3]) - self._position) # (max_x, max_y)
-    return bottom_left, top_right
+    cache = self._geom_cache()
+    if 'offsets' not in cache:
+      b = self.bounds
+      bottom_left = np.abs((b[0], b[1]) - self._position) # (min_x, min_y)
+      top_right = np.abs((b[2], b[3]) - self._position) # (max_x, max_y)
+      bottom_left.flags.writeable = False
+      top_right.flags.writeable = False
+      cache['offsets'] = bottom_left, top_right
+    return cache['offsets']
 
   @property
   def contours(self):
-    points = list(self.vertices)
-    points.append(points[0])
-    return LineString(points) 
\ No newline at end of file
+    cache = self._geom_cache()
+    if 'contours' not in cache:
+      v = self.vertices
+      cache['contours'] = LineString(np.concatenate((v, v[:1])))
+    return cache['contours']
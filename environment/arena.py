@@ -0,0 +1,43 @@
+"""Column-wise (structure of arrays) storage for the sprites of a scene."""
+
+import numpy as np
+from spriteworld._overlap_kernels import TOUCH_EPS
+
+
+class SpriteArena(object):
+  """Sprite state stored one row per sprite.
+
+  The sprites keep their usual interface: their positions become views into
+  the rows of `positions`, so moving a sprite updates the arena in place and
+  scene-wide queries run as array operations instead of per-sprite loops.
+  """
+
+  def __init__(self, sprites):
+    self.sprites = list(sprites)
+    n = len(self.sprites)
+    self.positions = np.empty((n, 2), dtype=np.float32)
+    # bounding box of each sprite relative to its position
+    self.extents = np.empty((n, 4))
+    for i, s in enumerate(self.sprites):
+      self.positions[i] = s.position
+      s._bind(self, i)
+      self.refresh(i)
+
+  def refresh(self, i):
+    """Recompute the bounding box extents of sprite i."""
+    vertices = self.sprites[i]._centered_vertices
+    self.extents[i, :2] = vertices.min(axis=0)
+    self.extents[i, 2:] = vertices.max(axis=0)
+
+  def bounds(self):
+    """(N, 4) array of (xmin, ymin, xmax, ymax) boxes."""
+    return self.positions[:, [0, 1, 0, 1]] + self.extents
+
+  def touching_pairs(self):
+    """Index arrays (i, j), i < j, of the sprites whose boxes touch."""
+    b = self.bounds()
+    touch = ((b[:, None, 0] <= b[None, :, 2] + TOUCH_EPS) &
+             (b[None, :, 0] <= b[:, None, 2] + TOUCH_EPS) &
+             (b[:, None, 1] <= b[None, :, 3] + TOUCH_EPS) &
+             (b[None, :, 1] <= b[:, None, 3] + TOUCH_EPS))
+    return np.nonzero(np.triu(touch, 1))
@@ -22,6 +22,7 @@ from __future__ import print_function
 import dm_env
 import numpy as np
 import six
+from spriteworld.arena import SpriteArena
 
 class Environment(dm_env.Environment):
   """Environment class for Spriteworld.
@@ -65,37 +66,40 @@ class Environment(dm_env.Environment):
     self._keep_in_frame = keep_in_frame
     self._max_episode_length = max_episode_length
     self._sprites = self._init_sprites()
+    self._arena = SpriteArena(self._sprites)
     self._step_count = 0
     self._reset_next_step = False
     self._renderers_initialized = False
     self._metadata = metadata
 
   def check_occlusion(self):
-    for i in range(len(self._sprites)):
-      for j in range(i+1, len(self._sprites)):
-        if self._sprites[i].check_collision(self._sprites[j]):
-          return True
+    # only sprites with touching bounding boxes can collide
+    for i, j in zip(*self._arena.touching_pairs()):
+      if self._sprites[i].check_collision(self._sprites[j]):
+        return True
     return False
 
   def get_image_dataset(self, train_samples=60000, test_samples=50):
-    
-    for i in range(train_samples):
-      timestep = self.reset()
-      image = timestep.observation["image"]/255
-      del timestep
-      with open(f"spriteworld/data/train/image_{i}.npy", 'wb') as f:
-        np.save(f, image)
-
+    self.save_images(range(train_samples), train_samples)
     print("training set generated")
-    
-    for i in range(test_samples):
+    self.save_images(range(train_samples, train_samples + test_samples), train_samples)
+
+  def save_images(self, indices, train_samples):
+    """Save the first frame of a new episode for each sample index.
+
+    Indices below train_samples go to the training set, the others to the test
+    set, so disjoint index ranges can be generated independently.
+    """
+    for i in indices:
       timestep = self.reset()
       image = timestep.observation["image"]/255
       del timestep
-      np.save(f"spriteworld/data/test/image_{train_samples + i}.npy", image)
+      split = "train" if i < train_samples else "test"
+      np.save(f"spriteworld/data/{split}/image_{i}.npy", image)
 
   def _reset(self):
     self._sprites = self._init_sprites()
+    self._arena = SpriteArena(self._sprites)
     self._step_count = 0
     self._reset_next_step = False
     return dm_env.restart(self.observation())
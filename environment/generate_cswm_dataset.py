@@ -73,20 +73,40 @@ class RandomAgent(object):
     return action
 
 
-def save_list_dict_h5py(array_dict, fname):
-  """Save list of dictionaries containing numpy arrays to h5py file."""
+_INV_255 = np.float32(1 / 255)
+
+
+def _scale_image(image, out=None):
+  """uint8 image to a float32 image in [0, 1]."""
+  return np.multiply(image, _INV_255, out=out, dtype=np.float32)
+
+
+def _open_h5py(fname):
+  """Open the h5py file fname for writing, creating its directory."""
 
   # Ensure directory exists
   import h5py, os
   directory = os.path.dirname(fname)
   if not os.path.exists(directory):
       os.makedirs(directory)
-  
-  with h5py.File(fname, 'w') as hf:
+  return h5py.File(fname, 'w')
+
+def save_dict_h5py(grp, arrays):
+  """Save a dictionary of numpy arrays to the h5py group grp."""
+  for key, value in arrays.items():
+    value = np.asarray(value)
+    if value.ndim > 1 and len(value):
+      # image stacks: one frame per chunk, lzf keeps compression cheap
+      grp.create_dataset(key, data=value, chunks=(1,) + value.shape[1:],
+                         compression='lzf')
+    else:
+      grp.create_dataset(key, data=value)
+
+def save_list_dict_h5py(array_dict, fname):
+  """Save list of dictionaries containing numpy arrays to h5py file."""
+  with _open_h5py(fname) as hf:
     for i in range(len(array_dict)):
-          grp = hf.create_group(str(i))
-          for key in array_dict[i].keys():
-              grp.create_dataset(key, data=array_dict[i][key])
+      save_dict_h5py(hf.create_group(str(i)), array_dict[i])
 
 def main(argv):
   del argv
@@ -106,28 +126,39 @@ def main(argv):
   sorting = sorting.get_config(FLAGS.mode)
   sorting['renderers']['success'] = renderers.Success()  # Used for logging
 
+  # the four tasks take turns; each keeps one environment, reset every episode
+  configs = (gfa, gfi, clustering, sorting)
+  envs = [environment.Environment(**config) for config in configs]
+  # frames[t] is the image after t steps, one buffer serves every episode
+  max_steps = max(config.get('max_episode_length', 1000) for config in configs)
+  frames = None
+
   # Loop over episodes, logging success and mean reward per episode
-  obs = []
-  for episode in range(FLAGS.num_episodes):
-    if episode % 4 == 0: env = environment.Environment(**gfa)
-    if episode % 4 == 1: env = environment.Environment(**gfi)
-    if episode % 4 == 2: env = environment.Environment(**clustering)
-    if episode % 4 == 3: env = environment.Environment(**sorting)
-    agent = RandomAgent(env)
-    timestep = env.reset()
-    rewards = []
-    obs.append({'obs': [], 'action': [], 'next_obs': []})
-    while not timestep.last():
-      obs[episode]['obs'].append(timestep.observation["image"]/255)
-      action = agent.step(timestep)
-      print(action)
-      obs[episode]['action'].append(action)
-      timestep = env.step(action)
-      obs[episode]['next_obs'].append(timestep.observation["image"]/255)
-      rewards.append(timestep.reward)
-    logging.info('Episode %d: Success = %r, Reward = %s.', episode,
-                 timestep.observation['success'], np.nanmean(rewards))
-  save_list_dict_h5py(obs, 'data/spriteworld.h5')
+  with _open_h5py('data/spriteworld.h5') as hf:
+    for episode in range(FLAGS.num_episodes):
+      env = envs[episode % 4]
+      agent = RandomAgent(env)
+      timestep = env.reset()
+      image = timestep.observation["image"]
+      if frames is None:
+        frames = np.empty((max_steps + 1,) + image.shape, dtype=np.float32)
+      rewards = []
+      actions = []
+      # every image is scaled once, to float32; obs and next_obs are the
+      # two overlapping views of the same frame stack
+      _scale_image(image, out=frames[0])
+      while not timestep.last():
+        action = agent.step(timestep)
+        actions.append(action)
+        timestep = env.step(action)
+        _scale_image(timestep.observation["image"], out=frames[len(actions)])
+        rewards.append(timestep.reward)
+      n = len(actions)
+      # each episode is written as soon as it ends, only one is held in memory
+      save_dict_h5py(hf.create_group(str(episode)), {
+          'obs': frames[:n], 'action': np.array(actions), 'next_obs': frames[1:n + 1]})
+      logging.info('Episode %d: Success = %r, Reward = %s.', episode,
+                   timestep.observation['success'], np.nanmean(rewards))
 
 if __name__ == '__main__':
   app.run(main)
@@ -1,5 +1,9 @@
 
 import importlib
+import multiprocessing
+import os
+import random
+import numpy as np
 from absl import app
 from absl import flags
 
@@ -12,14 +16,37 @@ flags.DEFINE_string('config',
                     'spriteworld.configs.examples.goal_finding_embodied',
                     'Module name of task config to use.')
 flags.DEFINE_string('mode', 'train', 'Task mode, "train" or "test"]')
+flags.DEFINE_integer('train_samples', 60000, 'Number of training images.')
+flags.DEFINE_integer('test_samples', 50, 'Number of test images.')
+flags.DEFINE_integer('num_workers', os.cpu_count(),
+                     'Number of processes generating images.')
+
+def _make_env(config_name, mode):
+  config = importlib.import_module(config_name)
+  config = config.get_config(mode)
+  config['renderers']['success'] = renderers.Success()  # Used for logging
+  return environment.Environment(**config)
+
+def _save_images(args):
+  config_name, mode, indices, train_samples = args
+  # forked workers inherit the parent's random state, reseed each of them
+  np.random.seed()
+  random.seed()
+  _make_env(config_name, mode).save_images(indices, train_samples)
 
 def main(argv):
   del argv
-  config = importlib.import_module(FLAGS.config)
-  config = config.get_config(FLAGS.mode)
-  config['renderers']['success'] = renderers.Success()  # Used for logging
-  env = environment.Environment(**config)
-  env.get_image_dataset()
+  if FLAGS.num_workers <= 1:
+    env = _make_env(FLAGS.config, FLAGS.mode)
+    env.get_image_dataset(FLAGS.train_samples, FLAGS.test_samples)
+    return
+
+  # every sample is an independent reset, split the indices across workers
+  indices = np.arange(FLAGS.train_samples + FLAGS.test_samples)
+  jobs = [(FLAGS.config, FLAGS.mode, chunk.tolist(), FLAGS.train_samples)
+          for chunk in np.array_split(indices, FLAGS.num_workers)]
+  with multiprocessing.Pool(FLAGS.num_workers) as pool:
+    pool.map(_save_images, jobs)
 
 if __name__ == '__main__':
-  app.run(main)
\ No newline at end of file
+  app.run(main)
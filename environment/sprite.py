@@ -20,13 +20,67 @@ from __future__ import division
 from __future__ import print_function
 
 import numpy as np
-from spriteworld.abstractsprite import AbstractSprite, FACTOR_NAMES
-from shapely.geometry import LineString, Point
+from shapely.geometry import Polygon
+from spriteworld.abstractsprite import AbstractSprite, FACTOR_NAMES, DIR
+from spriteworld._overlap_kernels import bboxes_touch
 
 from spriteworld.utils import *
 
 # Just to catch infinite while-looping. Anything >1e4 should be plenty safe.
 _MAX_TRIES = int(1e6)
+
+# per shape-pair collision and overlap handlers, resolved once at import
+_SHAPE_PAIRS = [(a, b) for a in ("circle", "square", "triangle")
+                for b in ("circle", "square", "triangle")]
+_HANDLERS = {(a, b): getattr(AbstractSprite, "_handle_%s_%s" % (a, b))
+             for a, b in _SHAPE_PAIRS}
+_RESOLVERS = {(a, b): getattr(AbstractSprite, "_%s_%s_overlap" % (a, b))
+              for a, b in _SHAPE_PAIRS}
+
+# per shape-pair overlap tests, test(s, o) -> bool
+_OVERLAP_TESTS = {
+    ("circle", "circle"): lambda s, o: circle_circle(s.position, o.position, s.prop, o.prop),
+    ("circle", "square"): lambda s, o: square_circle(s.position, o.position, s.prop, o.prop),
+    ("circle", "triangle"): lambda s, o: triangle_circle(o.vertices, s.position, s.prop),
+    ("square", "circle"): lambda s, o: square_circle(o.position, s.position, o.prop, s.prop),
+    ("square", "square"): lambda s, o: s.check_collision(o),
+    ("square", "triangle"): lambda s, o: triangle_square(o.vertices, s.bounds),
+    ("triangle", "circle"): lambda s, o: triangle_circle(s.vertices, o.position, o.prop),
+    ("triangle", "square"): lambda s, o: triangle_square(s.vertices, o.bounds),
+    ("triangle", "triangle"): lambda s, o: TriTri2D(s.vertices, o.vertices, allowReversed=True),
+}
+
+def _triangle_triangle_collision(s, o, motion, direction):
+  p1, p2 = s.vertices[1][1], s.vertices[2][1]
+  sv, ov = s._vertices_at(s._moved_position(motion)), o.vertices
+  p3, p4 = sv[1][1], sv[2][1]
+  collision = TriTri2D(sv, ov, allowReversed=True)
+  condition2 = False
+  if direction == "down":
+    if sv[2][0] < ov[0][0] and sv[2][0] >= ov[1][0]:
+      condition2 = ov[1][1] <= p1 and ov[1][1] >= p3
+    if sv[1][0] > ov[0][0] and sv[1][0] <= ov[2][0]:
+      condition2 = ov[2][1] <= p2 and ov[2][1] >= p4
+  if direction == "up":
+    if sv[2][0] < ov[0][0] and sv[2][0] >= ov[1][0]:
+      condition2 = ov[1][1] <= p3 and ov[1][1] >= p1
+    if sv[1][0] > ov[0][0] and sv[1][0] <= ov[2][0]:
+      condition2 = ov[2][1] <= p4 and ov[2][1] >= p2
+  return collision or condition2
+
+# per shape-pair collision tests for a motion, test(s, o, motion, direction)
+_COLLISION_TESTS = {
+    ("circle", "circle"): lambda s, o, m, d: circle_circle(s.position + m, o.position, s.prop, o.prop),
+    ("circle", "square"): lambda s, o, m, d: square_circle(s.position + m, o.position, s.prop, o.prop),
+    ("circle", "triangle"): lambda s, o, m, d: triangle_circle(o.vertices, s._position + m, s.prop),
+    ("square", "circle"): lambda s, o, m, d: square_circle(o.position, s._position + m, o.prop, s.prop),
+    ("square", "square"): lambda s, o, m, d: Polygon(s._vertices_at(s._moved_position(m))).intersects(o.polygon),
+    ("square", "triangle"): lambda s, o, m, d: triangle_square(o.vertices, s._bounds_at(s._moved_position(m))),
+    ("triangle", "circle"): lambda s, o, m, d: triangle_circle(s._vertices_at(s._moved_position(m)), o.position, o.prop),
+    ("triangle", "square"): lambda s, o, m, d: triangle_square(s._vertices_at(s._moved_position(m)), o.bounds),
+    ("triangle", "triangle"): _triangle_triangle_collision,
+}
+
 class Sprite(AbstractSprite):
   """Sprite class.
 
@@ -37,6 +91,7 @@ class Sprite(AbstractSprite):
   We assume that (x, y) are in mathematical coordinates, i.e. (0, 0) is at the
   lower-left of the frame.
   """
+  __slots__ = ()
 
   def __init__(self,
                x=0.5,
@@ -84,132 +139,37 @@ class Sprite(AbstractSprite):
       self.prop = np.sqrt(area) 
 
   def handle_collision(self, other, direction):
-    if self.shape == "circle" and other.shape == "circle":
-      self._handle_circle_circle(other, direction)
-    elif self.shape == "circle" and other.shape == "square": 
-      self._handle_circle_square(other, direction)
-    elif self.shape == "circle" and other.shape == "triangle":
-      self._handle_circle_triangle(other, direction)
-    elif self.shape == "square" and other.shape == "circle":
-      self._handle_square_circle(other, direction)
-    elif self.shape == "square" and other.shape == "square":
-      self._handle_square_square(other, direction)
-    elif self.shape == "square" and other.shape == "triangle": 
-      self._handle_square_triangle(other, direction)
-    elif self.shape == "triangle" and other.shape == "circle":
-      self._handle_triangle_circle(other, direction)
-    elif self.shape == "triangle" and other.shape == "square":
-      self._handle_triangle_square(other, direction)
-    elif self.shape == "triangle" and other.shape == "triangle": 
-      self._handle_triangle_triangle(other, direction)
-    else:
-      exit("Unexpected shapes")
+    handler = _HANDLERS.get((self._shape, other._shape))
+    if handler is None: exit("Unexpected shapes")
+    handler(self, other, DIR[direction])
 
   def resolve_overlapping(self, other, direction):
-    if self.shape == "circle" and other.shape == "circle":
-      self._circle_circle_overlap(other, direction)
-    elif self.shape == "circle" and other.shape == "square": 
-      self._circle_square_overlap(other, direction)
-    elif self.shape == "circle" and other.shape == "triangle": 
-      self._circle_triangle_overlap(other, direction)
-    elif self.shape == "square" and other.shape == "circle":
-      self._square_circle_overlap(other, direction)
-    elif self.shape == "square" and other.shape == "square":
-      self._square_square_overlap(other, direction)
-    elif self.shape == "square" and other.shape == "triangle": 
-      self._square_triangle_overlap(other, direction)
-    elif self.shape == "triangle" and other.shape == "circle":
-      self._triangle_circle_overlap(other, direction)
-    elif self.shape == "triangle" and other.shape == "square":
-      self._triangle_square_overlap(other, direction)
-    elif self.shape == "triangle" and other.shape == "triangle": 
-      self._triangle_triangle_overlap(other, direction)
-    else:
-      exit("Unexpected shape")
+    resolver = _RESOLVERS.get((self._shape, other._shape))
+    if resolver is None: exit("Unexpected shape")
+    resolver(self, other, DIR[direction])
 
   def avoid_overlapping(self, other, direction, resolve=True):
-    if self.shape == "circle":
-      if other.shape == "circle":
-        overlapping = circle_circle(self.position, other.position, self.prop, other.prop)
-      elif other.shape == "square":
-        overlapping = square_circle(self.position, other.position, self.prop, other.prop)
-      elif other.shape == "triangle":
-        overlapping = triangle_circle(other.vertices, self.position, self.prop)
-    
-    elif self.shape == "square":
-      if other.shape == "circle":
-        overlapping = square_circle(other.position, self.position, other.prop, self.prop)
-      elif other.shape == "square":
-        overlapping = self.check_collision(other)
-      elif other.shape == "triangle":
-        overlapping = triangle_square(other.vertices, self.bounds)
-        
-    elif self.shape == "triangle":
-      if other.shape == "circle":
-        overlapping = triangle_circle(self.vertices, other.position, other.prop) 
-      elif other.shape == "square":
-        overlapping = triangle_square(self.vertices, other.bounds)
-      elif other.shape == "triangle":
-        overlapping = TriTri2D(self.vertices, other.vertices, allowReversed=True)
-
+    test = _OVERLAP_TESTS.get((self._shape, other._shape))
+    if test is None: exit("Unexpected shape")
+    # sprites whose boxes do not touch cannot overlap, skip the exact test
+    overlapping = bboxes_touch(self._bounds_arr, other._bounds_arr) and test(self, other)
     if overlapping and resolve: 
       self.resolve_overlapping(other, direction)
     if not resolve: return overlapping
 
   def detect_collision(self, other, motion, direction):
-    if self.shape == "circle":    
-      if other.shape == "circle":
-        collision = circle_circle(self.position + motion, other.position, self.prop, other.prop)
-      elif other.shape == "square":
-        collision = square_circle(self.position + motion, other.position, self.prop, other.prop)
-      elif other.shape == "triangle":
-        collision = triangle_circle(other.vertices, self._position + motion, self.prop)
-
-    elif self.shape == "square":
-      if other.shape == "circle":
-        collision = square_circle(other.position, self._position + motion, other.prop, self.prop)
-      elif other.shape == "square":
-        self._position += motion
-        collision = self.check_collision(other)
-        self._position -= motion
-      elif other.shape == "triangle":
-        self._position += motion
-        collision = triangle_square(other.vertices, self.bounds)
-        self._position -= motion
-  
-    elif self.shape == "triangle":
-      p1 = self.vertices[1][1]
-      p2 = self.vertices[2][1]  
-      self._position += motion
-      if other.shape == "circle":
-        collision = triangle_circle(self.vertices, other._position, other.prop)
-      elif other.shape == "square":
-        collision = triangle_square(self.vertices, other.bounds)
-
-      elif other.shape == "triangle":
-        p3 = self.vertices[1][1]
-        p4 = self.vertices[2][1]
-        collision = TriTri2D(self.vertices, other.vertices, allowReversed=True)
-        condition2 = False
-        if direction == "down":
-          if self.vertices[2][0] < other.vertices[0][0] and self.vertices[2][0] >= other.vertices[1][0]:
-            condition2 = other.vertices[1][1] <= p1 and other.vertices[1][1] >= p3
-          if self.vertices[1][0] > other.vertices[0][0] and self.vertices[1][0] <= other.vertices[2][0]:
-            condition2 = other.vertices[2][1] <= p2 and other.vertices[2][1] >= p4
-        if direction == "up":
-          if self.vertices[2][0] < other.vertices[0][0] and self.vertices[2][0] >= other.vertices[1][0]:
-            condition2 = other.vertices[1][1] <= p3 and other.vertices[1][1] >= p1
-          if self.vertices[1][0] > other.vertices[0][0] and self.vertices[1][0] <= other.vertices[2][0]:
-            condition2 = other.vertices[2][1] <= p4 and other.vertices[2][1] >= p2
-        collision = collision or condition2
-      self._position -= motion
-
-    #if collision: self.handle_collision(other, direction)     
-    return collision
+    test = _COLLISION_TESTS.get((self._shape, other._shape))
+    if test is None: exit("Unexpected shape")
+    return test(self, other, motion, direction)
 
   def get_carried_sprite(self, sprites, motion, direction):
     """sprites doesn't contain this and agent sprite"""
-    return [s for s in sprites if self.detect_collision(s, motion, direction)]
+    # broad phase: only the sprites touching the box swept by the motion
+    # are passed to the exact collision test
+    b = self._bounds_arr
+    swept = np.concatenate((np.minimum(b[:2], b[:2] + motion), np.maximum(b[2:], b[2:] + motion)))
+    return [s for s in sprites
+            if bboxes_touch(swept, s._bounds_arr) and self.detect_collision(s, motion, direction)]
     
   def move(self, motion, keep_in_frame=False, others=None):
     """Move the sprite, optionally keeping its centerpoint within the frame."""
@@ -221,7 +181,7 @@ class Sprite(AbstractSprite):
         cs, carried_sprites = get_closest(self, carried_sprites, direction)
         self.handle_collision(cs, direction)
         positions = get_relative_positions(self, cs)
-        if direction in [opposite[p] for p in positions]:
+        if positions & DIRECTION_BITS[opposite[direction]]:
           self._position += motion
           others_ = [sprite for sprite in others if sprite != cs]
           cs.move(motion, keep_in_frame, others_)
@@ -239,7 +199,7 @@ class Sprite(AbstractSprite):
 
     if keep_in_frame:
       bottom_left, top_right = self.offsets
-      self._position = np.clip(self._position, 0.0 + bottom_left, 1.0 - top_right)
+      np.clip(self._position, 0.0 + bottom_left, 1.0 - top_right, out=self._position)
 
   def update_position(self, keep_in_frame=False, others=None):
     """Update position based on velocity."""
@@ -255,8 +215,22 @@ class Sprite(AbstractSprite):
 
   def sample_contained_position(self):
     """Sample random position uniformly within sprite."""
-    low = np.min(self._centered_path.vertices, axis=0)
-    high = np.max(self._centered_path.vertices, axis=0)
+    if self._shape == "circle" and self.prop is not None:
+      # polar sampling, the sqrt keeps the density uniform over the disk
+      r = self.prop * np.sqrt(np.random.uniform())
+      theta = np.random.uniform(0., 2 * np.pi)
+      return self._position + (r * np.cos(theta), r * np.sin(theta))
+    if self._shape == "triangle":
+      # barycentric sampling, points beyond the b-c edge are folded back
+      u, v = np.random.uniform(size=2)
+      if u + v > 1: u, v = 1 - u, 1 - v
+      a, b, c = self.vertices
+      return a + u * (b - a) + v * (c - a)
+    low = np.min(self._centered_vertices, axis=0)
+    high = np.max(self._centered_vertices, axis=0)
+    if self._shape == "square" and self._angle % 90 == 0:
+      # an axis-aligned square is its own bounding box
+      return self._position + np.random.uniform(low, high)
     for _ in range(_MAX_TRIES):
       sample = self._position + np.random.uniform(low, high)
       if self.contains_point(sample):
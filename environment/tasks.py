@@ -31,10 +31,7 @@ import random
 import numpy as np
 import six
 from sklearn import metrics
-from copy import deepcopy
 from spriteworld import constants
-from matplotlib import path as mpl_path
-from matplotlib import transforms as mpl_transforms
 
 
 
@@ -48,11 +45,7 @@ class GoalMark(object):
   def __init__(self, position, shape='spoke_4', color=(0., 1., 1.)):
     self._position = position
     self._color = color
-    path = mpl_path.Path(constants.SHAPES[shape])
-    scale_rotate = (
-        mpl_transforms.Affine2D().scale(0.07) +
-        mpl_transforms.Affine2D().rotate_deg(0))
-    self._centered_path = scale_rotate.transform_path(path)
+    self._centered_vertices = 0.07 * np.array(constants.SHAPES[shape], dtype=np.float64)
 
   def __eq__(self, __o):
     return self._position == __o._position
@@ -68,9 +61,7 @@ class GoalMark(object):
   @property
   def vertices(self):
     """Numpy array of vertices of the shape."""
-    transform = mpl_transforms.Affine2D().translate(*self._position)
-    path = transform.transform_path(self._centered_path)
-    return path.vertices
+    return self._centered_vertices + self._position
 
 @six.add_metaclass(abc.ABCMeta)
 class AbstractTask(object):
@@ -249,7 +240,7 @@ class FindGoalPositionInteractive(AbstractTask):
     """Calculate total reward summed over filtered sprites."""
     reward = 0.
     if self._previous_positions is None:
-      self._previous_positions = [s.position for s in deepcopy(sprites[:-1])]
+      self._previous_positions = [s.position.copy() for s in sprites[:-1]]
     reward = self._single_sprite_reward(sprites[:-1][self._goal_sprite])
     if reward >= 0: reward += self._terminate_bonus
 
@@ -258,8 +249,8 @@ class FindGoalPositionInteractive(AbstractTask):
         try:
           movement = self._previous_positions[i] - sprites[:-1][i].position
         except: exit((len(self._previous_positions), len(sprites[:-1])))
-        if np.linalg.norm(movement) != 0: reward -= 1
-    self._previous_positions = [s.position for s in deepcopy(sprites[:-1])]
+        if movement.any(): reward -= 1
+    self._previous_positions = [s.position.copy() for s in sprites[:-1]]
     return reward
 
   def success(self, sprites, reset_pos=False):
@@ -407,7 +398,6 @@ class SortingInteractive(Clustering):
     for c in clusters:
       if not c in self._goal_positions.keys():
         self._goal_positions[c] = positions.pop(random.randint(0, len(positions) - 1))  
-    del positions
 
   def _position_reward(self, sprites):
 
@@ -465,7 +455,6 @@ class SortingInteractive(Clustering):
         pos = ((pos[0] + pos[2])/2, (pos[1] + pos[3])/2)
         shape = sprite.shape
         goal_marks.add(GoalMark(pos, shape=shape))
-    del colors
     return goal_marks
 
 class MetaAggregated(AbstractTask):
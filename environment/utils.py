@@ -1,5 +1,6 @@
 import numpy as np
-from shapely.geometry import LineString
+from spriteworld.abstractsprite import AbstractSprite
+from spriteworld._overlap_kernels import njit, DIR, S5PI4
 
 # Defining region codes
 INSIDE = 0 # 0000
@@ -10,327 +11,240 @@ TOP = 8	 # 1000
 
 opposite = {"right": "left", "left": "right", "up": "down", "down": "up"}
 
-# Function to compute region code for a point(x, y)
-def computeCode(x, y, bounds):
-	x_min, y_min, x_max, y_max = bounds
-	code = INSIDE
-	if x < x_min:	 # to the left of rectangle
-		code |= LEFT
-	elif x > x_max: # to the right of rectangle
-		code |= RIGHT
-	if y < y_min:	 # below the rectangle
-		code |= BOTTOM
-	elif y > y_max: # above the rectangle
-		code |= TOP
-
-	return code
-
-# Clipping a line from P1 = (x1, y1) to P2 = (x2, y2)
-def cohenSutherlandClip(x1, y1, x2, y2, bounds):
-
-	x_min, y_min, x_max, y_max = bounds
-	# Compute region codes for P1, P2
-	code1 = computeCode(x1, y1, bounds)
-	code2 = computeCode(x2, y2, bounds)
-	accept = False
-
-	while True:
-
-		# If both endpoints lie within rectangle
-		if code1 == 0 and code2 == 0:
-			accept = True
-			break
-
-		# If both endpoints are outside rectangle
-		elif (code1 & code2) != 0:
-			break
-
-		# Some segment lies within the rectangle
-		else:
+# region code bit of each direction, the *_position functions return the
+# relative position of two sprites as a mask of these bits
+DIRECTION_BITS = {"left": LEFT, "right": RIGHT, "down": BOTTOM, "up": TOP}
 
-			# Line Needs clipping
-			# At least one of the points is outside,
-			# select it
-			x = 1.0
-			y = 1.0
-			if code1 != 0:
-				code_out = code1
-			else:
-				code_out = code2
+def _mirror(mask):
+	# swaps left with right and down with up
+	return ((mask & (LEFT | BOTTOM)) << 1) | ((mask & (RIGHT | TOP)) >> 1)
 
-			# Find intersection point
-			# using formulas y = y1 + slope * (x - x1),
-			# x = x1 + (1 / slope) * (y - y1)
-			if code_out & TOP:
-			
-				# point is above the clip rectangle
-				x = x1 + (x2 - x1) * (y_max - y1) / (y2 - y1)
-				y = y_max
-
-			elif code_out & BOTTOM:
-				
-				# point is below the clip rectangle
-				x = x1 + (x2 - x1) * (y_min - y1) / (y2 - y1)
-				y = y_min
-
-			elif code_out & RIGHT:
-				
-				# point is to the right of the clip rectangle
-				y = y1 + (y2 - y1) * (x_max - x1) / (x2 - x1)
-				x = x_max
-
-			elif code_out & LEFT:
-				
-				# point is to the left of the clip rectangle
-				y = y1 + (y2 - y1) * (x_min - x1) / (x2 - x1)
-				x = x_min
-
-			# Now intersection point x, y is found
-			# We replace point outside clipping rectangle
-			# by intersection point
-			if code_out == code1:
-				x1 = x
-				y1 = y
-				code1 = computeCode(x1, y1, bounds)
-
-			else:
-				x2 = x
-				y2 = y
-				code2 = computeCode(x2, y2, bounds)
-
-	return accept
+# Twice the signed area of triangle (a, b, c), i.e. the determinant of
+# [[ax, ay, 1], [bx, by, 1], [cx, cy, 1]]: positive when anti-clockwise
+@njit(cache=True)
+def _orient(ax, ay, bx, by, cx, cy):
+	return (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
 
+@njit(cache=True)
 def CheckTriWinding(tri, allowReversed):
-	trisq = np.ones((3,3))
-	trisq[:,0:2] = np.array(tri)
-	detTri = np.linalg.det(trisq)
-	if detTri < 0.0:
+	tri = tri.copy()
+	if _orient(tri[0,0], tri[0,1], tri[1,0], tri[1,1], tri[2,0], tri[2,1]) < 0.0:
 		if allowReversed:
-			a = trisq[2,:].copy()
-			trisq[2,:] = trisq[1,:]
-			trisq[1,:] = a
+			a = tri[2,:].copy()
+			tri[2,:] = tri[1,:]
+			tri[1,:] = a
 		else: raise ValueError("triangle has wrong winding direction")
-	return trisq
+	return tri
 
+@njit(cache=True)
+def _separating_edge(t1, t2):
+	# True if the points of t2 all lay on the external side of an edge of t1
+	for i in range(3):
+		ax, ay = t1[i,0], t1[i,1]
+		bx, by = t1[(i+1)%3,0], t1[(i+1)%3,1]
+		if (_orient(ax, ay, bx, by, t2[0,0], t2[0,1]) < 0.0 and
+			_orient(ax, ay, bx, by, t2[1,0], t2[1,1]) < 0.0 and
+			_orient(ax, ay, bx, by, t2[2,0], t2[2,1]) < 0.0):
+			return True
+	return False
+
+@njit(cache=True)
 def TriTri2D(t1, t2, allowReversed = False):
 	#Trangles must be expressed anti-clockwise
 	t1s = CheckTriWinding(t1, allowReversed)
 	t2s = CheckTriWinding(t2, allowReversed)
 
-	chkEdge = lambda x: np.linalg.det(x) < 0.0
-
-	#For edge E of trangle 1,
-	for i in range(3):
-		edge = np.roll(t1s, i, axis=0)[:2,:]
-
-		#Check all points of trangle 2 lay on the external side of the edge E. If
-		#they do, the triangles do not collide.
-		if (chkEdge(np.vstack((edge, t2s[0]))) and
-			chkEdge(np.vstack((edge, t2s[1]))) and  
-			chkEdge(np.vstack((edge, t2s[2])))):
-			return False
-
-	#For edge E of trangle 2,
-	for i in range(3):
-		edge = np.roll(t2s, i, axis=0)[:2,:]
-
-		#Check all points of trangle 1 lay on the external side of the edge E. If
-		#they do, the triangles do not collide.
-		if (chkEdge(np.vstack((edge, t1s[0]))) and
-			chkEdge(np.vstack((edge, t1s[1]))) and  
-			chkEdge(np.vstack((edge, t1s[2])))):
-			return False
+	#If all points of one trangle lay on the external side of an edge of the
+	#other, the triangles do not collide.
+	if _separating_edge(t1s, t2s) or _separating_edge(t2s, t1s):
+		return False
 
 	#The triangles collide
 	return True
 
+@njit(cache=True)
 def circle_circle(pos1, pos2, rad1, rad2):
-	return np.linalg.norm(pos1 - pos2) <= rad1 + rad2
+	# float64 differences, float32 positions would round near contact
+	dx, dy = np.float64(pos1[0]) - pos2[0], np.float64(pos1[1]) - pos2[1]
+	rad = rad1 + rad2
+	return dx * dx + dy * dy <= rad * rad
 
+@njit(cache=True)
 def square_circle(cpos, spos, rad, side):
-	dist = np.abs(cpos - spos)
-	if dist[0] > (side/2 + rad): return False
-	if dist[1] > (side/2 + rad): return False
-	if dist[0] <= side/2 or dist[1] <= side/2: return True
-	return np.linalg.norm(dist - side/2) <= rad
-
+	dx = abs(np.float64(cpos[0]) - spos[0])
+	dy = abs(np.float64(cpos[1]) - spos[1])
+	half = side * 0.5
+	limit = half + rad
+	if dx > limit or dy > limit: return False
+	if dx <= half or dy <= half: return True
+	dx, dy = dx - half, dy - half
+	return dx * dx + dy * dy <= rad * rad
+
+@njit(cache=True)
 def triangle_circle(tvert, cpos, rad):
-	# vertex within circle
-	if np.linalg.norm(tvert[0] - cpos) <= rad: return True 
-	if np.linalg.norm(tvert[1] - cpos) <= rad: return True
-	if np.linalg.norm(tvert[2] - cpos) <= rad: return True
-
+	cx, cy = cpos[0], cpos[1]
+	rad2 = rad * rad
+	positive = negative = False
+	for i in range(3):
+		ax, ay = tvert[i,0], tvert[i,1]
+		ex, ey = tvert[(i+1)%3,0] - ax, tvert[(i+1)%3,1] - ay
+		# closest point of the edge to the circle center, vertices included
+		t = ((cx - ax) * ex + (cy - ay) * ey) / (ex * ex + ey * ey)
+		t = min(max(t, 0.0), 1.0)
+		dx, dy = ax + t * ex - cx, ay + t * ey - cy
+		if dx * dx + dy * dy <= rad2: return True
+		# side of the edge the center lays on
+		side = ex * (cy - ay) - ey * (cx - ax)
+		positive |= side > 0.0
+		negative |= side < 0.0
 	# circle center within triangle
-	a = (tvert[1] - tvert[0]) * (cpos - tvert[0])
-	b = (tvert[2] - tvert[1]) * (cpos - tvert[1])
-	c = (tvert[0] - tvert[2]) * (cpos - tvert[2])
-	if a[0] >= a[1] and b[0] >= b[1] and c[0] >= c[1]: return True
-	
-	# circle intersects edge
-	cvert = cpos - tvert
-	edges = np.array([tvert[1] - tvert[0], tvert[2] - tvert[1], tvert[0] - tvert[2]])
-	k = (cvert * edges).sum(axis=1)
-	lens = np.sqrt((edges**2).sum(axis=1))
-	k_positive = np.where(k > 0)[0]
-	
-	if len(k_positive) == 0: return False
-	
-	k = k[k_positive]
-	lens = lens[k_positive]
-	cvert = cvert[k_positive]
-	half_k_higherthan_len = np.where(k/lens < lens)[0]
-	
-	if len(half_k_higherthan_len) == 0: return False
-
-	k = (k[half_k_higherthan_len] / lens[half_k_higherthan_len])**2
-	cvert = cvert[half_k_higherthan_len]
-	k = np.sqrt((cvert**2).sum(axis=1) - k)
-
-	return any(k <= rad) 
-
+	return not (positive and negative)
 
+@njit(cache=True)
 def triangle_square(tvert, bounds):
-	coll = cohenSutherlandClip(tvert[0][0], tvert[0][1], tvert[1][0], tvert[1][1], bounds)
-	if coll: return coll
-	coll = cohenSutherlandClip(tvert[0][0], tvert[0][1], tvert[2][0], tvert[2][1], bounds)
-	if coll: return coll
-	return cohenSutherlandClip(tvert[1][0], tvert[1][1], tvert[2][0], tvert[2][1], bounds)
-	
+	# separating axis test: the shapes are disjoint iff their projections are
+	# disjoint on x, y or one of the triangle edge normals
+	x_min, y_min, x_max, y_max = bounds
+	if max(tvert[0,0], tvert[1,0], tvert[2,0]) < x_min: return False
+	if min(tvert[0,0], tvert[1,0], tvert[2,0]) > x_max: return False
+	if max(tvert[0,1], tvert[1,1], tvert[2,1]) < y_min: return False
+	if min(tvert[0,1], tvert[1,1], tvert[2,1]) > y_max: return False
+	for i in range(3):
+		ax, ay = tvert[i,0], tvert[i,1]
+		bx, by = tvert[(i+1)%3,0], tvert[(i+1)%3,1]
+		cx, cy = tvert[(i+2)%3,0], tvert[(i+2)%3,1]
+		nx, ny = ay - by, bx - ax
+		# the edge projects to a single point, the opposite vertex to another
+		pe = nx*ax + ny*ay
+		pc = nx*cx + ny*cy
+		box_min = min(nx*x_min, nx*x_max) + min(ny*y_min, ny*y_max)
+		box_max = max(nx*x_min, nx*x_max) + max(ny*y_min, ny*y_max)
+		if box_max < min(pe, pc) or box_min > max(pe, pc): return False
+	return True
+
+# direction of an axis-aligned motion, keyed by the signs of its components
+_MOTION_DIRECTIONS = {(0, 1): "up", (1, 0): "right", (0, -1): "down", (-1, 0): "left"}
 
 def get_motion_direction(motion):
-	if motion[0] == 0 and motion[1] > 0:
-		return "up"
-	elif motion[1] == 0 and motion[0] > 0:
-		return "right"
-	elif motion[0] == 0 and motion[1] < 0:
-		return "down"
-	elif motion[1] == 0 and motion[0] < 0:
-		return "left"
-	else:
-		exit("unexpected direction")
+	x, y = motion[0], motion[1]
+	direction = _MOTION_DIRECTIONS.get((int(x > 0) - int(x < 0), int(y > 0) - int(y < 0)))
+	if direction is None: exit("unexpected direction")
+	return direction
 
 def get_relative_positions(s1, s2):
 	# returns the position of s1 relative to s2
-	if s1.shape == "circle":
-		if s2.shape == "circle":
-			directions = circle_circle_position(s1,s2) 
-		elif s2.shape == "square":
-			directions = circle_square_position(s1,s2)
-		else:
-			directions = circle_triangle_position(s1,s2)
-	elif s1.shape == "square":
-		if s2.shape == "circle":
-			directions = circle_square_position(s2,s1, True) 
-		elif s2.shape == "square":
-			directions = square_square_position(s1,s2)
-		else:
-			directions = square_triangle_position(s1,s2)
-	else:
-		if s2.shape == "circle":
-			directions = triangle_circle_position(s2,s1) 
-		elif s2.shape == "square":
-			directions = triangle_square_position(s1,s2)
-		else:
-			directions = triangle_triangle_position(s1,s2)
-
-	return directions
+	position = _RELATIVE_POSITIONS.get((s1._shape, s2._shape))
+	if position is None: exit("Unexpected shape")
+	return position(s1, s2)
 
 def circle_circle_position(s1, s2):
-	directions = []
-	if s1.position[0] < s2.position[0]: directions.append("left")
-	if s1.position[0] > s2.position[0]: directions.append("right")
-	if s1.position[1] < s2.position[1]: directions.append("down")
-	if s1.position[1] > s2.position[1]: directions.append("up")
-	return directions
+	mask = INSIDE
+	p1, p2 = s1.position, s2.position
+	if p1[0] < p2[0]: mask |= LEFT
+	elif p1[0] > p2[0]: mask |= RIGHT
+	if p1[1] < p2[1]: mask |= BOTTOM
+	elif p1[1] > p2[1]: mask |= TOP
+	return mask
 
 def circle_square_position(s1, s2, reverse=False):
-	directions = []
-	if s1.position[0] < s2.bounds[0]: directions.append("left")
-	if s1.position[0] > s2.bounds[2]: directions.append("right")
-	if s1.position[1] < s2.bounds[1]: directions.append("down")
-	if s1.position[1] > s2.bounds[3]: directions.append("up")
-	return [opposite[d] for d in directions] if reverse else directions
+	mask = INSIDE
+	p, b = s1.position, s2.bounds
+	if p[0] < b[0]: mask |= LEFT
+	elif p[0] > b[2]: mask |= RIGHT
+	if p[1] < b[1]: mask |= BOTTOM
+	elif p[1] > b[3]: mask |= TOP
+	return _mirror(mask) if reverse else mask
 
 def circle_triangle_position(c, t):
-	directions = []
-	y = c.y + c.prop * np.sin((5*np.pi)/4)
-	if c.x < t.x and c.bounds[1] < t.bounds[3] and c.bounds[3] > t.bounds[1]: directions.append("left")
-	if c.x > t.x and c.bounds[1] < t.bounds[3] and c.bounds[3] > t.bounds[1]: directions.append("right")
-	if y > t.bounds[1]: directions.append("up")
-	if c.y + c.prop <= t.bounds[1] + 0.02: directions.append("down")
-	return directions
+	mask = INSIDE
+	cb, tb = c.bounds, t.bounds
+	y = c.y + c.prop * S5PI4
+	if c.x < t.x and cb[1] < tb[3] and cb[3] > tb[1]: mask |= LEFT
+	if c.x > t.x and cb[1] < tb[3] and cb[3] > tb[1]: mask |= RIGHT
+	if y > tb[1]: mask |= TOP
+	if c.y + c.prop <= tb[1] + 0.02: mask |= BOTTOM
+	return mask
 
 def triangle_circle_position(c, t):
-	directions = []
-	if t.x < c.x and ((t.bounds[1] <= c.bounds[3] and t.bounds[3] >= c.bounds[1]) or (t.bounds[3] <= c.bounds[3] and t.bounds[1] >= c.bounds[1])): directions.append("left")
-	if t.x > c.x and ((t.bounds[1] <= c.bounds[3] and t.bounds[3] >= c.bounds[1]) or (t.bounds[3] <= c.bounds[3] and t.bounds[1] >= c.bounds[1])): directions.append("right")
-	if t.bounds[1] > c.y: directions.append("up")
-	if t.bounds[1] <= c.y: directions.append("down")
-	return directions
+	mask = INSIDE
+	cb, tb = c.bounds, t.bounds
+	if t.x < c.x and ((tb[1] <= cb[3] and tb[3] >= cb[1]) or (tb[3] <= cb[3] and tb[1] >= cb[1])): mask |= LEFT
+	if t.x > c.x and ((tb[1] <= cb[3] and tb[3] >= cb[1]) or (tb[3] <= cb[3] and tb[1] >= cb[1])): mask |= RIGHT
+	if tb[1] > c.y: mask |= TOP
+	if tb[1] <= c.y: mask |= BOTTOM
+	return mask
 
 def square_square_position(s1, s2):
-	directions = []
-	if s1.position[0] <= s2.bounds[0]: directions.append("left")
-	if s1.position[0] >= s2.bounds[2]: directions.append("right")
-	if s1.position[1] <= s2.bounds[1]: directions.append("down")
-	if s1.position[1] >= s2.bounds[3]: directions.append("up")
-	return directions
+	mask = INSIDE
+	p, b = s1.position, s2.bounds
+	if p[0] <= b[0]: mask |= LEFT
+	elif p[0] >= b[2]: mask |= RIGHT
+	if p[1] <= b[1]: mask |= BOTTOM
+	elif p[1] >= b[3]: mask |= TOP
+	return mask
 
 def square_triangle_position(s, t):
-	directions = []
-	if s.x < t.x and s.bounds[1] < t.bounds[3] and s.bounds[3] > t.bounds[1]: directions.append("left")
-	if s.x > t.x and s.bounds[1] < t.bounds[3] and s.bounds[3] > t.bounds[1]: directions.append("right")
-	if s.bounds[1] > t.bounds[1]: directions.append("up")
-	if s.y < t.bounds[1] and s.bounds[0] <= t.bounds[2] and s.bounds[2] >= t.bounds[0]: directions.append("down")
-	return directions
+	mask = INSIDE
+	sb, tb = s.bounds, t.bounds
+	if s.x < t.x and sb[1] < tb[3] and sb[3] > tb[1]: mask |= LEFT
+	if s.x > t.x and sb[1] < tb[3] and sb[3] > tb[1]: mask |= RIGHT
+	if sb[1] > tb[1]: mask |= TOP
+	if s.y < tb[1] and sb[0] <= tb[2] and sb[2] >= tb[0]: mask |= BOTTOM
+	return mask
 
 def triangle_square_position(t, s):
-	directions = []
-	if t.x < s.x and t.bounds[1] <= s.bounds[3] and t.bounds[3] >= s.bounds[1]: directions.append("left")
-	if t.x > s.x and t.bounds[1] <= s.bounds[3] and t.bounds[3] >= s.bounds[1]: directions.append("right")
-	if t.y >= s.bounds[3]: directions.append("up")
-	if t.bounds[1] < s.bounds[1] and t.bounds[2] >= s.bounds[0] and t.bounds[0] <= t.bounds[2]: directions.append("down")
-	return directions
+	mask = INSIDE
+	tb, sb = t.bounds, s.bounds
+	if t.x < s.x and tb[1] <= sb[3] and tb[3] >= sb[1]: mask |= LEFT
+	if t.x > s.x and tb[1] <= sb[3] and tb[3] >= sb[1]: mask |= RIGHT
+	if t.y >= sb[3]: mask |= TOP
+	if tb[1] < sb[1] and tb[2] >= sb[0] and tb[0] <= tb[2]: mask |= BOTTOM
+	return mask
 
 def triangle_triangle_position(t1, t2):
-	directions = []
-	if t1.x < t2.x and t1.bounds[1] < t2.bounds[3] and t1.bounds[3] > t2.bounds[1]: directions.append("left")
-	if t1.x > t2.x and t1.bounds[1] < t2.bounds[3] and t1.bounds[3] > t2.bounds[1]: directions.append("right")
-	if t1.bounds[1] > t2.bounds[1]: directions.append("up")
-	if t1.y < t2.bounds[1] and t1.bounds[0] <= t2.bounds[2] and t1.bounds[2] >= t2.bounds[0]: directions.append("down")
-	return directions
+	mask = INSIDE
+	b1, b2 = t1.bounds, t2.bounds
+	if t1.x < t2.x and b1[1] < b2[3] and b1[3] > b2[1]: mask |= LEFT
+	if t1.x > t2.x and b1[1] < b2[3] and b1[3] > b2[1]: mask |= RIGHT
+	if b1[1] > b2[1]: mask |= TOP
+	if t1.y < b2[1] and b1[0] <= b2[2] and b1[2] >= b2[0]: mask |= BOTTOM
+	return mask
+
+# per shape-pair relative position functions, f(s1, s2)
+_RELATIVE_POSITIONS = {
+	("circle", "circle"): circle_circle_position,
+	("circle", "square"): circle_square_position,
+	("circle", "triangle"): circle_triangle_position,
+	("square", "circle"): lambda s1, s2: circle_square_position(s2, s1, True),
+	("square", "square"): square_square_position,
+	("square", "triangle"): square_triangle_position,
+	("triangle", "circle"): lambda s1, s2: triangle_circle_position(s2, s1),
+	("triangle", "square"): triangle_square_position,
+	("triangle", "triangle"): triangle_triangle_position,
+}
+
+# per shape-pair distance methods, resolved once at import
+_DISTANCES = {(a, b): getattr(AbstractSprite, "%s_%s_distance" % (a, b))
+	for a in ("circle", "square", "triangle") for b in ("circle", "square", "triangle")}
 
 def _get_distance(s1, s2, direction):
-	if s1.shape == "circle" and s2.shape == "circle":
-		return s1.circle_circle_distance(s2, direction)
-	elif s1.shape == "circle" and s2.shape == "square": 
-		return s1.circle_square_distance(s2, direction)
-	elif s1.shape == "circle" and s2.shape == "triangle": 
-		return s1.circle_triangle_distance(s2, direction)
-	elif s1.shape == "square" and s2.shape == "circle":
-		return s1.square_circle_distance(s2, direction)
-	elif s1.shape == "square" and s2.shape == "square":
-		return s1.square_square_distance(s2, direction)
-	elif s1.shape == "square" and s2.shape == "triangle": 
-		return s1.square_triangle_distance(s2, direction)
-	elif s1.shape == "triangle" and s2.shape == "circle":
-		return s1.triangle_circle_distance(s2, direction)
-	elif s1.shape == "triangle" and s2.shape == "square":
-		return s1.triangle_square_distance(s2, direction)
-	elif s1.shape == "triangle" and s2.shape == "triangle": 
-		return s1.triangle_triangle_distance(s2, direction)
-	else:
-		exit("Unexpected shape") 
-	
+	distance = _DISTANCES.get((s1._shape, s2._shape))
+	if distance is None: exit("Unexpected shape")
+	return distance(s1, s2, direction)
+
 def get_closest(s, carried, direction):
+	# a single candidate is the closest, no distance needed
+	if len(carried) == 1: return carried[0], []
 	i = np.argmin([_get_distance(s, cs, direction) for cs in carried]) 
 	closest = carried[i]
 	carried.pop(i)
 	return closest, carried
 
-def direction_bound(s, s2, direction):
-	if direction == "down": return abs(s.bounds[1] - s2.y)
-	elif direction == "up": return abs(s.bounds[3] - s2.y)
-	elif direction == "right": return abs(s.bounds[2] - s2.x)
-	else: return abs(s.bounds[0]  - s2.x)
+# side of the bounds and axis of the position compared by direction_bound,
+# indexed by the DOWN, UP, RIGHT, LEFT codes
+_BOUND_SIDES = (1, 3, 2, 0)
+_BOUND_AXES = (1, 1, 0, 0)
 
+def direction_bound(s, s2, direction):
+	d = DIR[direction]
+	return abs(s.bounds[_BOUND_SIDES[d]] - s2.position[_BOUND_AXES[d]])